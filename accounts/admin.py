@@ -8,6 +8,7 @@ from .models import UserProfile
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'company', 'role', 'phone', 'created_at']
+    list_select_related = ['user', 'company']
     list_filter = ['role', 'company']
     search_fields = ['user__username', 'user__email', 'phone']
     ordering = ['user__username']
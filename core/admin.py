@@ -91,6 +91,7 @@ class EmployeePositionAdmin(ModelAdmin):
 @admin.register(Employee)
 class EmployeeAdmin(CompanyRestrictedAdmin):
     list_display = ['full_name', 'position', 'company', 'is_active']
+    list_select_related = ['position', 'company']
     list_filter = ['company', 'position', 'is_active']
     search_fields = ['first_name', 'last_name', 'email', 'phone']
     ordering = ['last_name', 'first_name']
@@ -61,12 +61,16 @@ class CompanyScopedQuerySet(models.QuerySet):
         Override bulk_create to auto-assign company
         
         Args:
-            objs: List of model instances
+            objs: Iterable of model instances
             **kwargs: Additional arguments
         
         Returns:
             List of created instances
         """
+        # Materialize once: a generator would be exhausted by the loop below
+        objs = list(objs)
+        
+        # Resolve the tenant once, not per row
         current_company = get_current_company()
         
         # Auto-assign company to objects that don't have it set
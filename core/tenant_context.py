@@ -3,7 +3,7 @@ Tenant Context Manager
 Safe context management for background tasks and management commands
 """
 from contextlib import contextmanager
-from .mixins import set_current_company
+from .mixins import get_current_company, set_current_company
 
 
 @contextmanager
@@ -13,6 +13,7 @@ def tenant_context(company):
     
     Ensures proper cleanup even if exceptions occur.
     Use this in management commands and background tasks.
+    Nesting is safe: the previous company (usually None) is restored on exit.
     
     Args:
         company: Company instance to set as current context
@@ -24,7 +25,7 @@ def tenant_context(company):
             # All queries here are scoped to my_company
             expenses = CompanyExpense.objects.all()
         
-        # Context is automatically cleared here
+        # Context is automatically restored here
     
     Example (Management Command):
         class Command(BaseCommand):
@@ -36,6 +37,7 @@ def tenant_context(company):
                     process_expenses()
     """
     # Set company context
+    previous_company = get_current_company()
     set_current_company(company)
     
     try:
@@ -43,4 +45,4 @@ def tenant_context(company):
         yield
     finally:
         # Always cleanup, even if exception occurs
-        set_current_company(None)
+        set_current_company(previous_company)
@@ -43,6 +43,7 @@ class ExpenseCategoryAdmin(ModelAdmin):
 @admin.register(CostCenter)
 class CostCenterAdmin(CompanyRestrictedAdmin):
     list_display = ['name', 'type', 'company', 'vehicle', 'driver', 'is_active']
+    list_select_related = ['company', 'vehicle', 'driver__position']
     list_filter = ['company', 'type', 'is_active']
     search_fields = ['name', 'description']
     ordering = ['company', 'name']
@@ -92,6 +93,7 @@ class CostCenterAdmin(CompanyRestrictedAdmin):
 @admin.register(CostRateSnapshot)
 class CostRateSnapshotAdmin(CompanyRestrictedAdmin):
     list_display = ['cost_center', 'basis_unit', 'rate', 'total_cost', 'total_units', 'period_start', 'period_end', 'status', 'company']
+    list_select_related = ['cost_center__company', 'company']
     list_filter = ['company', 'cost_center', 'basis_unit', 'status', 'period_start']
     search_fields = ['cost_center__name']
     date_hierarchy = 'period_start'
@@ -140,6 +142,7 @@ class OrderCostBreakdownAdmin(CompanyRestrictedAdmin):
         'transport_order', 'total_cost', 'revenue', 'profit', 'margin',
         'period_start', 'period_end', 'status', 'company'
     ]
+    list_select_related = ['transport_order', 'company']
     list_filter = ['company', 'status', 'period_start', 'transport_order__assigned_vehicle']
     search_fields = ['transport_order__customer_name', 'transport_order__origin', 'transport_order__destination']
     date_hierarchy = 'period_start'
@@ -188,6 +191,7 @@ class OrderCostBreakdownAdmin(CompanyRestrictedAdmin):
 @admin.register(CompanyExpense)
 class CompanyExpenseAdmin(CompanyRestrictedAdmin):
     list_display = ['category', 'company', 'amount', 'start_date', 'end_date', 'is_amortized', 'is_active']
+    list_select_related = ['category__family', 'category__company', 'company']
     list_filter = ['company', 'category', 'is_amortized', 'is_active']
     search_fields = ['category__name', 'description', 'invoice_number']
     ordering = ['-created_at']
@@ -410,6 +414,7 @@ class TransportOrderAdmin(CompanyRestrictedAdmin):
 @admin.register(CostItem)
 class CostItemAdmin(CompanyRestrictedAdmin):
     list_display = ['name', 'category', 'unit', 'company', 'is_active']
+    list_select_related = ['company']
     list_filter = ['company', 'category', 'unit', 'is_active']
     search_fields = ['name', 'description']
     ordering = ['company', 'category', 'name']
@@ -458,6 +463,7 @@ class CostItemAdmin(CompanyRestrictedAdmin):
 @admin.register(CostPosting)
 class CostPostingAdmin(CompanyRestrictedAdmin):
     list_display = ['cost_item', 'cost_center', 'amount', 'period_start', 'period_end', 'company']
+    list_select_related = ['cost_item', 'cost_center__company', 'company']
     list_filter = ['company', 'cost_center', 'cost_item', 'period_start']
     search_fields = ['cost_item__name', 'cost_center__name', 'notes']
     date_hierarchy = 'period_start'
@@ -158,24 +158,23 @@ class CostCalculator:
         # Get recent fuel entries (last 6 months) where tank was filled
         six_months_ago = datetime.now() - timedelta(days=180)
         
-        fuel_entries = FuelEntry.objects.filter(
-            vehicle=self.vehicle,
-            is_full_tank=True,
-            date__gte=six_months_ago
-        ).order_by('date')
+        # Only (odometer, liters) pairs are needed: one query, no model hydration
+        fuel_readings = list(
+            FuelEntry.objects.filter(
+                vehicle=self.vehicle,
+                is_full_tank=True,
+                date__gte=six_months_ago
+            ).order_by('date').values_list('odometer_reading', 'liters')
+        )
         
-        if fuel_entries.count() < 2:
+        if len(fuel_readings) < 2:
             # Not enough data - use default consumption
             avg_consumption_per_100km = Decimal('25.0')  # Default: 25L/100km
         else:
             # Calculate actual consumption from full-tank entries
             consumptions = []
-            for i in range(1, len(fuel_entries)):
-                prev_entry = fuel_entries[i-1]
-                curr_entry = fuel_entries[i]
-                
-                km_driven = curr_entry.odometer_reading - prev_entry.odometer_reading
-                liters_consumed = curr_entry.liters
+            for (prev_odometer, _), (curr_odometer, liters_consumed) in zip(fuel_readings, fuel_readings[1:]):
+                km_driven = curr_odometer - prev_odometer
                 
                 if km_driven > 0:
                     consumption_per_100km = (liters_consumed / Decimal(str(km_driven))) * 100
@@ -187,8 +186,10 @@ class CostCalculator:
                 avg_consumption_per_100km = Decimal('25.0')
         
         # Get current fuel price (from most recent entry or use default)
-        latest_fuel_entry = FuelEntry.objects.filter(vehicle=self.vehicle).order_by('-date').first()
-        current_fuel_price = latest_fuel_entry.cost_per_liter if latest_fuel_entry else self.DEFAULT_FUEL_PRICE
+        latest_fuel_price = FuelEntry.objects.filter(vehicle=self.vehicle).order_by('-date').values_list(
+            'cost_per_liter', flat=True
+        ).first()
+        current_fuel_price = latest_fuel_price if latest_fuel_price is not None else self.DEFAULT_FUEL_PRICE
         
         fuel_cost = (avg_consumption_per_100km * current_fuel_price * self.distance_km) / 100
         return fuel_cost
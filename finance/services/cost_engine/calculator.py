@@ -138,11 +138,11 @@ def calculate_company_costs(company, period_start: date, period_end: date) -> Di
     cost_centers = list(cost_centers_qs)
 
     # Build handy lookups to avoid repeated filtering in loops
-    vehicle_center_by_vehicle_id: Dict[int, Any] = {}
+    vehicle_centers_by_vehicle_id: Dict[int, List[Any]] = {}
     overhead_centers: List[Any] = []
     for cc in cost_centers:
         if getattr(cc, "type", None) == "VEHICLE" and getattr(cc, "vehicle_id", None):
-            vehicle_center_by_vehicle_id[cc.vehicle_id] = cc
+            vehicle_centers_by_vehicle_id.setdefault(cc.vehicle_id, []).append(cc)
         if getattr(cc, "type", None) == "OVERHEAD":
             overhead_centers.append(cc)
 
@@ -162,6 +162,14 @@ def calculate_company_costs(company, period_start: date, period_end: date) -> Di
     # Step 3: Aggregate postings by cost center
     cost_by_center = aggregate_postings_by_cost_center(postings)
 
+    # One center per vehicle for order costing. If a vehicle has several
+    # VEHICLE centers, take the one with posted cost, then the oldest, so an
+    # empty duplicate never hides the real one.
+    vehicle_center_by_vehicle_id: Dict[int, Any] = {
+        vehicle_id: min(centers, key=lambda cc: (not cost_by_center.get(cc.id), cc.id))
+        for vehicle_id, centers in vehicle_centers_by_vehicle_id.items()
+    }
+
     # Step 4: Build cost-center snapshots
     snapshots: List[Dict[str, Any]] = []
 
@@ -116,6 +116,10 @@ class CostEnginePersistence:
 
         created: List[CostRateSnapshot] = []
 
+        # Load the tenant's cost centers once; each center appears in up to 4 snapshots
+        # Use scoped manager + explicit company filter (belt & suspenders)
+        cost_centers_by_id = CostCenter.objects.filter(company=company).in_bulk()
+
         # ----------------------------
         # A) dict-of-dicts format
         # ----------------------------
@@ -126,11 +130,13 @@ class CostEnginePersistence:
 
                 if not cost_center_id or not isinstance(rates, dict):
                     continue
-
-                # Use scoped manager + explicit company filter (belt & suspenders)
                 try:
-                    cost_center = CostCenter.objects.get(id=cost_center_id, company=company)
-                except CostCenter.DoesNotExist:
+                    cost_center_id = int(cost_center_id)
+                except Exception:
+                    continue
+
+                cost_center = cost_centers_by_id.get(cost_center_id)
+                if cost_center is None:
                     continue
 
                 total_cost = _to_decimal(rates.get("total_cost"))
@@ -187,9 +193,8 @@ class CostEnginePersistence:
             except Exception:
                 continue
 
-            try:
-                cost_center = CostCenter.objects.get(id=cost_center_id, company=company)
-            except CostCenter.DoesNotExist:
+            cost_center = cost_centers_by_id.get(cost_center_id)
+            if cost_center is None:
                 continue
 
             basis_unit = (snap.get("basis_unit") or "KM")
@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from dotenv import load_dotenv
 from django.core.exceptions import ImproperlyConfigured
 
@@ -128,6 +129,8 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', ''),
         'HOST': os.getenv('DB_HOST', ''),
         'PORT': os.getenv('DB_PORT', ''),
+        # Unset: SQLite tests run in memory. Set a file path to reuse it with test --keepdb
+        'TEST': {'NAME': os.getenv('DB_TEST_NAME') or None},
     }
 }
 
@@ -150,6 +153,15 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Test runs (manage.py test): fast hasher so create_user() doesn't spend
+# hundreds of thousands of PBKDF2 rounds per fixture user. Never used otherwise.
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
+if TESTING:
+    PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
@@ -188,6 +200,23 @@ DECIMAL_SEPARATOR = ','
 
 STATIC_URL = 'static/'
 
+# Uploaded files (service invoices, incident photos, employee photos)
+MEDIA_URL = 'media/'
+MEDIA_ROOT = os.getenv('MEDIA_ROOT', str(BASE_DIR / 'media'))
+
+# File storage
+# Set FILE_STORAGE_BACKEND to an object-storage backend in production
+# (e.g. storages.backends.s3boto3.S3Boto3Storage) so large invoice PDFs
+# are streamed off the app server instead of written to local disk.
+STORAGES = {
+    'default': {
+        'BACKEND': os.getenv('FILE_STORAGE_BACKEND', 'django.core.files.storage.FileSystemStorage'),
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
@@ -16,7 +16,8 @@ class FuelEntryAdmin(CompanyRestrictedAdmin):
         'is_full_tank', 'odometer_reading', 'driver', 'company'
     ]
     list_filter = ['company', 'is_full_tank', 'date', 'vehicle']
-    search_fields = ['vehicle__plate', 'driver__user__first_name', 'driver__user__last_name', 'fuel_station_name']
+    list_select_related = ['vehicle', 'driver__position', 'company']
+    search_fields = ['vehicle__license_plate', 'driver__first_name', 'driver__last_name', 'fuel_station_name']
     date_hierarchy = 'date'
     ordering = ['-date', '-created_at']
     
@@ -75,7 +76,8 @@ class ServiceLogAdmin(CompanyRestrictedAdmin):
         'total_cost', 'invoice_number', 'company'
     ]
     list_filter = ['company', 'service_type', 'date', 'vehicle']
-    search_fields = ['vehicle__plate', 'invoice_number', 'description']
+    list_select_related = ['vehicle', 'company']
+    search_fields = ['vehicle__license_plate', 'invoice_number', 'description']
     date_hierarchy = 'date'
     ordering = ['-date', '-created_at']
     
@@ -133,7 +135,8 @@ class IncidentReportAdmin(CompanyRestrictedAdmin):
         'cost_estimate', 'is_resolved', 'company'
     ]
     list_filter = ['company', 'type', 'is_resolved', 'date', 'vehicle']
-    search_fields = ['vehicle__plate', 'driver__user__first_name', 'driver__user__last_name', 'location', 'description']
+    list_select_related = ['vehicle', 'driver__position', 'company']
+    search_fields = ['vehicle__license_plate', 'driver__first_name', 'driver__last_name', 'location', 'description']
     date_hierarchy = 'date'
     ordering = ['-date', '-created_at']
     
@@ -171,6 +174,7 @@ class VehicleAdmin(CompanyRestrictedAdmin):
         'license_plate', 'make', 'model', 'vehicle_class', 'body_type', 'fuel_type',
         'status', 'company', 'get_current_value', 'get_annual_depreciation', 'get_hourly_rate'
     ]
+    list_select_related = ['company']
     list_filter = ['company', 'vehicle_class', 'body_type', 'status', 'fuel_type', 'emission_class']
     search_fields = ['license_plate', 'vin', 'make', 'model']
     ordering = ['license_plate']
@@ -222,10 +226,15 @@ class VehicleAdmin(CompanyRestrictedAdmin):
     
     readonly_fields = ['created_at', 'updated_at']
     
+    def get_queryset(self, request):
+        """Annotate the DB-side accounting value so the column is sortable"""
+        return Vehicle.with_accounting_value(super().get_queryset(request))
+    
     def get_current_value(self, obj):
         """Display current accounting value"""
-        return f"€{obj.current_accounting_value:,.2f}"
+        return f"€{obj.current_value_db:,.2f}"
     get_current_value.short_description = "Τρέχουσα Αξία"
+    get_current_value.admin_order_field = 'current_value_db'
     
     def get_annual_depreciation(self, obj):
         return f"€{obj.annual_depreciation:,.2f}"
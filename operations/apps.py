@@ -10,5 +10,22 @@ class OperationsConfig(AppConfig):
         """
         Import signals when the app is ready
         This ensures signals are registered and active
+        (receivers carry a dispatch_uid, so a repeated import cannot
+        connect them twice)
+        
+        The vehicle_cost_summary view is dropped before every migrate run
+        and rebuilt after it, so migrations never see it.
         """
-        import operations.signals
+        from django.db.models.signals import post_migrate, pre_migrate
+        from operations import signals
+        
+        pre_migrate.connect(
+            signals.drop_cost_summary_before_migrate,
+            sender=self,
+            dispatch_uid='ops.migrate.drop_cost_summary'
+        )
+        post_migrate.connect(
+            signals.create_cost_summary_after_migrate,
+            sender=self,
+            dispatch_uid='ops.migrate.create_cost_summary'
+        )
@@ -0,0 +1,16 @@
+"""
+Management command to refresh the vehicle_cost_summary materialized view
+Schedule nightly (cron) so dashboard totals stay current
+"""
+from django.core.management.base import BaseCommand
+from operations.services import refresh_vehicle_cost_summary
+
+
+class Command(BaseCommand):
+    help = 'Refresh the vehicle_cost_summary materialized view (PostgreSQL only)'
+
+    def handle(self, *args, **options):
+        if refresh_vehicle_cost_summary():
+            self.stdout.write(self.style.SUCCESS('✓ vehicle_cost_summary refreshed'))
+        else:
+            self.stdout.write('vehicle_cost_summary is a plain view on this backend; nothing to refresh')
@@ -0,0 +1,32 @@
+# Generated by Django 5.0.14 on 2026-10-17 10:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0007_driverprofile_to_employee_driver'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleCostSummary',
+            fields=[
+                ('vehicle', models.OneToOneField(on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='cost_summary', serialize=False, to='operations.vehicle', verbose_name='Όχημα')),
+                ('fuel_total', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Κόστος Καυσίμων (€)')),
+                ('service_total', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Κόστος Συντήρησης (€)')),
+                ('incident_total', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Κόστος Συμβάντων (€)')),
+                ('total_cost', models.DecimalField(decimal_places=2, max_digits=14, verbose_name='Συνολικό Κόστος (€)')),
+            ],
+            options={
+                'verbose_name': 'Σύνοψη Κόστους Οχήματος',
+                'verbose_name_plural': 'Συνόψεις Κόστους Οχημάτων',
+                'db_table': 'vehicle_cost_summary',
+                'managed': False,
+            },
+        ),
+        # The view itself is (re)created after every migrate run by the
+        # post_migrate hook in OperationsConfig.ready (see operations.services)
+    ]
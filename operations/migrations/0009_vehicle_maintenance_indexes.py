@@ -0,0 +1,18 @@
+# Generated by Django 5.0.14 on 2026-10-17 10:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_fix_adr_categories'),
+        ('operations', '0008_vehiclecostsummary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['company', 'status', 'current_odometer'], name='operations__company_63d1ce_idx'),
+        ),
+    ]
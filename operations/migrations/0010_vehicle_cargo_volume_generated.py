@@ -0,0 +1,24 @@
+# Generated by Django 5.0.14 on 2026-10-17 10:09
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_fix_adr_categories'),
+        ('operations', '0009_vehicle_maintenance_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicle',
+            name='cargo_volume_m3',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(django.db.models.expressions.CombinedExpression(models.F('cargo_length_m'), '*', models.F('cargo_width_m')), '*', models.F('cargo_height_m')), help_text='Υπολογίζεται από τη βάση (μήκος × πλάτος × ύψος)', output_field=models.DecimalField(decimal_places=4, max_digits=10, null=True), verbose_name='Όγκος Χώρου Φορτίου (m³)'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(condition=models.Q(('status', 'ACTIVE')), fields=['cargo_volume_m3'], name='vehicle_cargo_volume_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Range-partitioning FuelEntry/ServiceLog on date would need a composite
+# (id, date) primary key, which Django models cannot express. These tables
+# are append-mostly in date order, so a BRIN index on date gives planners
+# the same block-range pruning for time-window reports at a fraction of
+# the size of a B-tree. PostgreSQL only; other backends keep the existing
+# (vehicle, -date) / (company, -date) B-tree indexes.
+
+from django.db import migrations
+
+
+BRIN_INDEXES = [
+    ('operations_fuelentry', 'operations_fuelentry_date_brin'),
+    ('operations_servicelog', 'operations_servicelog_date_brin'),
+]
+
+
+def create_brin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, index in BRIN_INDEXES:
+        schema_editor.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {table} USING brin (date)")
+
+
+def drop_brin_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for _, index in BRIN_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {index}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('operations', '0010_vehicle_cargo_volume_generated'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_brin_indexes, drop_brin_indexes),
+    ]
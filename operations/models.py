@@ -2,9 +2,16 @@
 Operations Models for GreekFleet 360
 Fuel, Service, and Incident Tracking
 """
+import calendar
+import math
+from datetime import date
+from functools import lru_cache
 from django.db import models
+from django.db.models import Case, DecimalField, F, FloatField, Q, Value, When
+from django.db.models.functions import Cast, ExtractMonth, ExtractYear, Power, Round
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
+from dateutil.relativedelta import relativedelta
 from core.models import Company
 from core.mixins import CompanyScopedManager
 
@@ -103,12 +110,21 @@ class FuelEntry(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.vehicle.plate} - {self.date} - {self.liters}L"
+        return f"{self.vehicle.license_plate} - {self.date} - {self.liters}L"
     
-    def save(self, *args, **kwargs):
-        # Auto-calculate total_cost if not provided
+    def fill_total_cost(self):
+        """
+        Auto-calculate total_cost if not provided (liters × cost_per_liter)
+        
+        Kept as a stored, editable column rather than a GENERATED one:
+        the receipt amount may legitimately differ from the product.
+        Shared by save() and the bulk import helpers.
+        """
         if not self.total_cost:
             self.total_cost = self.liters * self.cost_per_liter
+    
+    def save(self, *args, **kwargs):
+        self.fill_total_cost()
         super().save(*args, **kwargs)
 
 
@@ -124,6 +140,7 @@ class ServiceLog(models.Model):
         ('KTEO', 'Έλεγχος ΚΤΕΟ'),
         ('TACHOGRAPH', 'Βαθμονόμηση Ταχογράφου'),
     ]
+    _SERVICE_TYPE_LABELS = dict(SERVICE_TYPES)
     
     company = models.ForeignKey(
         Company,
@@ -203,12 +220,23 @@ class ServiceLog(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.vehicle.plate} - {self.get_service_type_display()} - {self.date}"
+        return f"{self.vehicle.license_plate} - {self.get_service_type_display()} - {self.date}"
     
-    def save(self, *args, **kwargs):
-        # Auto-calculate total_cost if not provided
+    def get_service_type_display(self):
+        # O(1) label lookup; Django's default rebuilds a dict from choices on every call
+        return self._SERVICE_TYPE_LABELS.get(self.service_type, self.service_type)
+    
+    def fill_total_cost(self):
+        """
+        Auto-calculate total_cost if not provided (parts + labor)
+        
+        Shared by save() and the bulk import helpers.
+        """
         if not self.total_cost:
             self.total_cost = self.cost_parts + self.cost_labor
+    
+    def save(self, *args, **kwargs):
+        self.fill_total_cost()
         super().save(*args, **kwargs)
 
 
@@ -222,6 +250,7 @@ class IncidentReport(models.Model):
         ('FINE', 'Κλήση Τροχαίας'),
         ('BREAKDOWN', 'Βλάβη'),
     ]
+    _INCIDENT_TYPE_LABELS = dict(INCIDENT_TYPES)
     
     company = models.ForeignKey(
         Company,
@@ -297,7 +326,26 @@ class IncidentReport(models.Model):
         ]
     
     def __str__(self):
-        return f"{self.vehicle.plate} - {self.get_type_display()} - {self.date}"
+        return f"{self.vehicle.license_plate} - {self.get_type_display()} - {self.date}"
+    
+    def get_type_display(self):
+        # O(1) label lookup; Django's default rebuilds a dict from choices on every call
+        return self._INCIDENT_TYPE_LABELS.get(self.type, self.type)
+
+
+@lru_cache(maxsize=None)
+def _depreciation_factor(retained_rate, months_owned):
+    """
+    Depreciation factor retained_rate^(months/12) for whole months of ownership
+    
+    Uses float exp/log instead of Decimal.__pow__ with a fractional
+    exponent, and caches per (rate, months) since many vehicles share both.
+    
+    Returns:
+        Decimal: Remaining fraction of the purchase value
+    """
+    years = months_owned / 12
+    return Decimal(str(math.exp(math.log(retained_rate) * years)))
 
 
 class Vehicle(models.Model):
@@ -309,6 +357,9 @@ class Vehicle(models.Model):
     
     # Depreciation Constant (16% annual rate)
     ANNUAL_DEPRECIATION_RATE = Decimal('0.16')
+    # Value kept per year (1 - rate); hoisted so hot paths skip the subtraction
+    RETAINED_VALUE_RATE = Decimal('1') - ANNUAL_DEPRECIATION_RATE
+    _RETAINED_VALUE_RATE_FLOAT = float(RETAINED_VALUE_RATE)
     
     # ========== ENUMS / CHOICES ==========
     
@@ -360,6 +411,12 @@ class Vehicle(models.Model):
         INACTIVE = 'INACTIVE', 'Ανενεργό'
         SOLD = 'SOLD', 'Πωλήθηκε'
     
+    # Label maps for the get_FOO_display overrides (rendered per row in fleet lists)
+    _VEHICLE_CLASS_LABELS = dict(VehicleClass.choices)
+    _BODY_TYPE_LABELS = dict(BodyType.choices)
+    _EMISSION_CLASS_LABELS = dict(EmissionClass.choices)
+    _STATUS_LABELS = dict(Status.choices)
+    
     # ========== SECTION 1: IDENTITY (From Registration Certificate) ==========
     company = models.ForeignKey(
         Company,
@@ -492,6 +549,13 @@ class Vehicle(models.Model):
         verbose_name="Ύψος Χώρου Φορτίου (m)",
         help_text="Εσωτερικό ύψος χώρου φορτίου"
     )
+    cargo_volume_m3 = models.GeneratedField(
+        expression=F('cargo_length_m') * F('cargo_width_m') * F('cargo_height_m'),
+        output_field=models.DecimalField(max_digits=10, decimal_places=4, null=True),
+        db_persist=True,
+        verbose_name="Όγκος Χώρου Φορτίου (m³)",
+        help_text="Υπολογίζεται από τη βάση (μήκος × πλάτος × ύψος)"
+    )
     
     # ========== SECTION 4: WEIGHTS (From Registration Certificate) ==========
     gross_weight_kg = models.IntegerField(
@@ -623,11 +687,30 @@ class Vehicle(models.Model):
             models.Index(fields=['company', 'status']),
             models.Index(fields=['vehicle_class']),
             models.Index(fields=['license_plate']),
+            models.Index(fields=['company', 'status', 'current_odometer']),
+            # Routing capacity range scans
+            models.Index(
+                fields=['cargo_volume_m3'],
+                name='vehicle_cargo_volume_idx',
+                condition=Q(status='ACTIVE'),
+            ),
         ]
     
     def __str__(self):
         return f"{self.license_plate} - {self.make} {self.model}"
     
+    def get_vehicle_class_display(self):
+        return self._VEHICLE_CLASS_LABELS.get(self.vehicle_class, self.vehicle_class)
+    
+    def get_body_type_display(self):
+        return self._BODY_TYPE_LABELS.get(self.body_type, self.body_type)
+    
+    def get_emission_class_display(self):
+        return self._EMISSION_CLASS_LABELS.get(self.emission_class, self.emission_class)
+    
+    def get_status_display(self):
+        return self._STATUS_LABELS.get(self.status, self.status)
+    
     @property
     def payload_capacity_kg(self):
         """
@@ -649,27 +732,73 @@ class Vehicle(models.Model):
         Returns:
             Decimal: Current accounting value
         """
-        from datetime import date
-        from dateutil.relativedelta import relativedelta
-        
         if not self.acquisition_date or not self.purchase_value:
             return self.purchase_value
         
-        # Calculate years since acquisition
-        today = date.today()
-        years_owned = relativedelta(today, self.acquisition_date).years
-        months_owned = relativedelta(today, self.acquisition_date).months
-        
-        # Convert to decimal years (including months)
-        total_years = Decimal(str(years_owned)) + (Decimal(str(months_owned)) / Decimal('12'))
+        # Whole months since acquisition (single relativedelta)
+        owned = relativedelta(date.today(), self.acquisition_date)
+        months_owned = owned.years * 12 + owned.months
         
         # Calculate depreciation: value * (1 - rate)^years
-        depreciation_factor = (Decimal('1') - self.ANNUAL_DEPRECIATION_RATE) ** total_years
-        current_value = self.purchase_value * depreciation_factor
+        depreciation_factor = _depreciation_factor(self._RETAINED_VALUE_RATE_FLOAT, months_owned)
+        current_value = (self.purchase_value * depreciation_factor).quantize(Decimal('0.01'))
         
         # Ensure value doesn't go below zero
         return max(current_value, Decimal('0.00'))
     
+    @classmethod
+    def with_accounting_value(cls, queryset=None):
+        """
+        Annotate current_value_db: current_accounting_value computed in the DB
+        
+        Lets list views and the admin sort/filter on the depreciated value
+        without materializing every Vehicle. Months owned follow the same
+        whole-month rule as relativedelta, including its month-end clamp
+        (acquired Jan 31 is 3 months old on Apr 30); rows without
+        acquisition_date or purchase_value keep purchase_value.
+        
+        Args:
+            queryset: Vehicle queryset to annotate (default: Vehicle.objects.all())
+        
+        Returns:
+            QuerySet annotated with current_value_db
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+        
+        today = date.today()
+        # relativedelta clamps to the month end: on the last day of a month
+        # every later acquisition day counts as a whole month already
+        if today.day == calendar.monthrange(today.year, today.month)[1]:
+            partial_month = Value(0)
+        else:
+            partial_month = Case(When(acquisition_date__day__gt=today.day, then=Value(1)), default=Value(0))
+        months_owned = (
+            (Value(today.year) - ExtractYear('acquisition_date')) * 12
+            + (Value(today.month) - ExtractMonth('acquisition_date'))
+            - partial_month
+        )
+        retained = Value(cls._RETAINED_VALUE_RATE_FLOAT, output_field=FloatField())
+        # POWER() returns a float; cast back to a 2-place decimal like the
+        # property's quantize. SQLite keeps a REAL under CAST AS NUMERIC, so
+        # round explicitly as well.
+        depreciated = Round(
+            Cast(
+                F('purchase_value') * Power(retained, months_owned / Value(12.0)),
+                output_field=DecimalField(max_digits=12, decimal_places=2)
+            ),
+            2
+        )
+        
+        return queryset.annotate(
+            current_value_db=Case(
+                When(acquisition_date__isnull=True, then=F('purchase_value')),
+                When(purchase_value=0, then=F('purchase_value')),
+                default=depreciated,
+                output_field=DecimalField(max_digits=12, decimal_places=2)
+            )
+        )
+    
     @property
     def annual_depreciation(self):
         """
@@ -691,16 +820,49 @@ class Vehicle(models.Model):
         if self.available_hours_per_year <= 0:
             return Decimal('0.00')
         
-        return self.annual_depreciation / Decimal(str(self.available_hours_per_year))
+        # Decimal(int) is exact; no str() round-trip needed
+        return self.annual_depreciation / Decimal(self.available_hours_per_year)
+
+
+class VehicleCostSummary(models.Model):
+    """
+    Per-vehicle cost totals (read-only, backed by the vehicle_cost_summary view)
+    
+    MATERIALIZED VIEW on PostgreSQL (refresh with the
+    refresh_vehicle_cost_summary command), plain VIEW on other backends.
+    Not created by a migration: OperationsConfig.ready drops it before and
+    rebuilds it after every migrate run (operations.services).
+    Lets dashboards read fuel/service/incident totals with an indexed
+    lookup instead of re-aggregating three tables per request.
+    """
+    vehicle = models.OneToOneField(
+        Vehicle,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        related_name='cost_summary',
+        verbose_name="Όχημα"
+    )
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.DO_NOTHING,
+        related_name='+',
+        verbose_name="Εταιρεία"
+    )
     
-    @property
-    def cargo_volume_m3(self):
-        """
-        Calculate internal cargo volume in cubic meters
-        
-        Returns:
-            Decimal: Cargo volume in m³, or None if dimensions missing
-        """
-        if self.cargo_length_m and self.cargo_width_m and self.cargo_height_m:
-            return self.cargo_length_m * self.cargo_width_m * self.cargo_height_m
-        return None
+    # Tenant Isolation Managers
+    objects = CompanyScopedManager()
+    all_objects = models.Manager()
+    
+    fuel_total = models.DecimalField(max_digits=14, decimal_places=2, verbose_name="Κόστος Καυσίμων (€)")
+    service_total = models.DecimalField(max_digits=14, decimal_places=2, verbose_name="Κόστος Συντήρησης (€)")
+    incident_total = models.DecimalField(max_digits=14, decimal_places=2, verbose_name="Κόστος Συμβάντων (€)")
+    total_cost = models.DecimalField(max_digits=14, decimal_places=2, verbose_name="Συνολικό Κόστος (€)")
+    
+    class Meta:
+        managed = False
+        db_table = 'vehicle_cost_summary'
+        verbose_name = "Σύνοψη Κόστους Οχήματος"
+        verbose_name_plural = "Συνόψεις Κόστους Οχημάτων"
+    
+    def __str__(self):
+        return f"{self.vehicle_id} - {self.total_cost}"
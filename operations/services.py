@@ -0,0 +1,195 @@
+"""
+Operations Services
+Batch helpers for bulk FuelEntry/ServiceLog imports and reporting views
+
+The import helpers must run inside tenant_context(company), like any
+other scoped ORM access outside a request.
+"""
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+
+# Tables the vehicle_cost_summary view reads; any migration that rebuilds
+# one of them (SQLite table remake, PostgreSQL ALTER COLUMN) would fail
+# while the view exists, so the view only lives outside migrate runs
+SUMMARY_SOURCE_TABLES = frozenset({
+    'operations_vehicle',
+    'operations_fuelentry',
+    'operations_servicelog',
+    'operations_incidentreport',
+})
+
+# One grouped pass per source table, LEFT JOINed so every vehicle appears;
+# each sum is computed once and reused for total_cost
+SUMMARY_SELECT = """
+    SELECT
+        v.id AS vehicle_id,
+        v.company_id AS company_id,
+        COALESCE(f.fuel_total, 0) AS fuel_total,
+        COALESCE(s.service_total, 0) AS service_total,
+        COALESCE(i.incident_total, 0) AS incident_total,
+        COALESCE(f.fuel_total, 0) + COALESCE(s.service_total, 0) + COALESCE(i.incident_total, 0) AS total_cost
+    FROM operations_vehicle v
+    LEFT JOIN (
+        SELECT vehicle_id, SUM(total_cost) AS fuel_total
+        FROM operations_fuelentry GROUP BY vehicle_id
+    ) f ON f.vehicle_id = v.id
+    LEFT JOIN (
+        SELECT vehicle_id, SUM(total_cost) AS service_total
+        FROM operations_servicelog GROUP BY vehicle_id
+    ) s ON s.vehicle_id = v.id
+    LEFT JOIN (
+        SELECT vehicle_id, SUM(cost_estimate) AS incident_total
+        FROM operations_incidentreport GROUP BY vehicle_id
+    ) i ON i.vehicle_id = v.id
+"""
+
+
+def refresh_odometers(vehicle_ids):
+    """
+    Raise current_odometer to the highest FuelEntry/ServiceLog reading
+
+    One UPDATE for all vehicles instead of one per imported row.
+    Never lowers an odometer (same rule as the post_save receivers).
+    Only vehicles of the current tenant context are touched.
+
+    Args:
+        vehicle_ids: iterable of Vehicle primary keys
+
+    Returns:
+        int: Number of vehicle rows updated
+    """
+    from .models import FuelEntry, ServiceLog, Vehicle
+
+    def max_reading(model):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(vehicle=OuterRef('pk'))
+                .order_by('-odometer_reading')
+                .values('odometer_reading')[:1]
+            ),
+            Value(0)
+        )
+
+    return Vehicle.objects.filter(pk__in=set(vehicle_ids)).update(
+        current_odometer=Greatest(
+            'current_odometer',
+            max_reading(FuelEntry),
+            max_reading(ServiceLog)
+        )
+    )
+
+
+def bulk_create_fuel_entries(entries, **kwargs):
+    """
+    bulk_create FuelEntries and refresh the affected odometers once
+
+    save() is bypassed, so total_cost is filled here with the same rule.
+
+    Args:
+        entries: list of unsaved FuelEntry instances
+        **kwargs: forwarded to bulk_create
+
+    Returns:
+        List of created FuelEntry instances
+    """
+    from .models import FuelEntry
+
+    entries = list(entries)
+    for entry in entries:
+        entry.fill_total_cost()
+
+    created = FuelEntry.objects.bulk_create(entries, **kwargs)
+    refresh_odometers(entry.vehicle_id for entry in created)
+    return created
+
+
+def bulk_create_service_logs(logs, **kwargs):
+    """
+    bulk_create ServiceLogs and refresh the affected odometers once
+
+    save() is bypassed, so total_cost is filled here with the same rule.
+
+    Args:
+        logs: list of unsaved ServiceLog instances
+        **kwargs: forwarded to bulk_create
+
+    Returns:
+        List of created ServiceLog instances
+    """
+    from .models import ServiceLog
+
+    logs = list(logs)
+    for log in logs:
+        log.fill_total_cost()
+
+    created = ServiceLog.objects.bulk_create(logs, **kwargs)
+    refresh_odometers(log.vehicle_id for log in created)
+    return created
+
+
+def refresh_vehicle_cost_summary():
+    """
+    Refresh the vehicle_cost_summary materialized view
+
+    CONCURRENTLY keeps dashboard reads unblocked while it rebuilds
+    (backed by the unique index on vehicle_id). On non-PostgreSQL
+    backends the summary is a plain VIEW and is always current.
+
+    Returns:
+        bool: True if a refresh was executed
+    """
+    if connection.vendor != 'postgresql':
+        return False
+
+    with connection.cursor() as cursor:
+        cursor.execute("REFRESH MATERIALIZED VIEW CONCURRENTLY vehicle_cost_summary")
+    return True
+
+
+def drop_vehicle_cost_summary(using=DEFAULT_DB_ALIAS):
+    """
+    Drop the vehicle_cost_summary view if it exists
+
+    Args:
+        using: Database alias
+    """
+    db = connections[using]
+    kind = 'MATERIALIZED VIEW' if db.vendor == 'postgresql' else 'VIEW'
+    with db.cursor() as cursor:
+        cursor.execute(f"DROP {kind} IF EXISTS vehicle_cost_summary")
+
+
+def create_vehicle_cost_summary(using=DEFAULT_DB_ALIAS):
+    """
+    (Re)create the vehicle_cost_summary view from SUMMARY_SELECT
+
+    MATERIALIZED VIEW (+ unique index for CONCURRENTLY refresh) on
+    PostgreSQL, plain VIEW elsewhere (SQLite has no materialized views).
+    Does nothing until every source table exists (e.g. after migrating
+    operations back to zero).
+
+    Args:
+        using: Database alias
+
+    Returns:
+        bool: True if the view was created
+    """
+    db = connections[using]
+    if not SUMMARY_SOURCE_TABLES.issubset(db.introspection.table_names()):
+        return False
+
+    drop_vehicle_cost_summary(using)
+    with db.cursor() as cursor:
+        if db.vendor == 'postgresql':
+            cursor.execute(f"CREATE MATERIALIZED VIEW vehicle_cost_summary AS {SUMMARY_SELECT}")
+            cursor.execute(
+                "CREATE UNIQUE INDEX vehicle_cost_summary_vehicle_id ON vehicle_cost_summary (vehicle_id)"
+            )
+            cursor.execute(
+                "CREATE INDEX vehicle_cost_summary_company_id ON vehicle_cost_summary (company_id)"
+            )
+        else:
+            cursor.execute(f"CREATE VIEW vehicle_cost_summary AS {SUMMARY_SELECT}")
+    return True
@@ -1,43 +1,108 @@
 """
 Django Signals for Operations App
-Auto-update vehicle odometer, trigger maintenance alerts, and auto-create CostCenter
+Auto-update vehicle odometer, auto-create CostCenter,
+and keep the vehicle_cost_summary view out of the way of migrations
+
+Bulk importers that still save() row by row should wrap the loop in
+disable_signals() and call operations.services.refresh_odometers()
+once afterwards (bulk_create does not send post_save at all).
 """
+import threading
+from contextlib import contextmanager
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import Value
+from django.db.models.functions import Greatest
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from core.models import Company
+from core.tenant_context import tenant_context
 from .models import FuelEntry, ServiceLog, Vehicle
+from .services import create_vehicle_cost_summary, drop_vehicle_cost_summary
+
+
+# Thread-local switch for bulk imports (same pattern as core.mixins tenant context)
+_state = threading.local()
+
+
+@contextmanager
+def disable_signals():
+    """
+    Context manager that short-circuits the operations receivers
+    
+    Usage:
+        from operations.signals import disable_signals
+        from operations.services import refresh_odometers
+        
+        with tenant_context(company):
+            with disable_signals():
+                for row in rows:
+                    FuelEntry.objects.create(**row)
+            refresh_odometers(row['vehicle_id'] for row in rows)
+    """
+    previous = getattr(_state, 'disabled', False)
+    _state.disabled = True
+    
+    try:
+        yield
+    finally:
+        _state.disabled = previous
+
+
+def _skip_receiver(instance, kwargs):
+    """
+    True for fixture loads (raw), inside disable_signals(), or for
+    instances flagged _skip_signal
+    """
+    return (
+        kwargs.get('raw')
+        or getattr(_state, 'disabled', False)
+        or getattr(instance, '_skip_signal', False)
+    )
 
 
-@receiver(post_save, sender=FuelEntry)
+def _raise_vehicle_odometer(instance):
+    """
+    Raise the vehicle's current_odometer to instance.odometer_reading
+    
+    Single atomic UPDATE with Greatest(): no read round-trip, and a
+    concurrent higher reading can never be overwritten by a lower one.
+    Scoped by company_id alone, so the Company row is never loaded.
+    """
+    with tenant_context(Company(pk=instance.company_id)):
+        Vehicle.objects.filter(pk=instance.vehicle_id).update(
+            current_odometer=Greatest('current_odometer', Value(instance.odometer_reading))
+        )
+
+
+@receiver(post_save, sender=FuelEntry, dispatch_uid='ops.fuel.odometer')
 def update_odometer_from_fuel_entry(sender, instance, created, **kwargs):
     """
     Automatically update vehicle's current_odometer when a new FuelEntry is saved
     Only updates if the new reading is greater than the current odometer
+    Skipped for fixture loads, disable_signals() and _skip_signal;
+    bulk importers call operations.services.refresh_odometers instead
     """
-    if created or instance.odometer_reading > instance.vehicle.current_odometer:
-        if instance.odometer_reading > instance.vehicle.current_odometer:
-            instance.vehicle.current_odometer = instance.odometer_reading
-            instance.vehicle.save(update_fields=['current_odometer'])
-            
-            # TODO: Trigger maintenance alert check
-            # check_upcoming_maintenance(instance.vehicle)
+    if _skip_receiver(instance, kwargs):
+        return
+    
+    _raise_vehicle_odometer(instance)
 
 
-@receiver(post_save, sender=ServiceLog)
+@receiver(post_save, sender=ServiceLog, dispatch_uid='ops.service.odometer')
 def update_odometer_from_service_log(sender, instance, created, **kwargs):
     """
     Automatically update vehicle's current_odometer when a new ServiceLog is saved
     Only updates if the new reading is greater than the current odometer
+    Skipped for fixture loads, disable_signals() and _skip_signal;
+    bulk importers call operations.services.refresh_odometers instead
     """
-    if created or instance.odometer_reading > instance.vehicle.current_odometer:
-        if instance.odometer_reading > instance.vehicle.current_odometer:
-            instance.vehicle.current_odometer = instance.odometer_reading
-            instance.vehicle.save(update_fields=['current_odometer'])
-            
-            # TODO: Trigger maintenance alert check
-            # check_upcoming_maintenance(instance.vehicle)
+    if _skip_receiver(instance, kwargs):
+        return
+    
+    _raise_vehicle_odometer(instance)
 
 
-@receiver(post_save, sender=Vehicle)
+@receiver(post_save, sender=Vehicle, dispatch_uid='ops.vehicle.cost_center')
 def create_cost_center_for_vehicle(sender, instance, created, **kwargs):
     """
     Automatically create a CostCenter in the finance app when a new Vehicle is created
@@ -45,33 +110,53 @@ def create_cost_center_for_vehicle(sender, instance, created, **kwargs):
     Logic:
     - Name: {license_plate} - {make}
     - Company: Same as vehicle
+    - Linked through CostCenter.vehicle (type VEHICLE), so reports and the
+      cost engine join on the FK instead of matching the name; if the vehicle
+      already has a VEHICLE center (e.g. CC-<plate> from seed_cost_engine_demo,
+      created in the same transaction) the auto center stays an unlinked OTHER
     - This allows tracking vehicle-specific costs
+    - Deferred with transaction.on_commit: the INSERT runs after the
+      Vehicle transaction commits and never outlives a rollback
+    - Skipped for fixture loads (raw) and inside disable_signals()
     """
-    if created:
+    if created and not _skip_receiver(instance, kwargs):
         from finance.models import CostCenter
         
         # Create CostCenter with vehicle details
         cost_center_name = f"{instance.license_plate} - {instance.make}"
+        defaults = {
+            'description': f"Αυτόματο Κέντρο Κόστους για όχημα {instance.license_plate} ({instance.make} {instance.model})",
+            'is_active': True,
+        }
+        # Scoping only needs the pk; instance.company could cost a SELECT
+        company = Company(pk=instance.company_id)
         
-        # Check if CostCenter already exists (safety check)
-        if not CostCenter.objects.filter(company=instance.company, name=cost_center_name).exists():
-            CostCenter.objects.create(
-                company=instance.company,
-                name=cost_center_name,
-                description=f"Αυτόματο Κέντρο Κόστους για όχημα {instance.license_plate} ({instance.make} {instance.model})",
-                is_active=True
-            )
+        def create_cost_center():
+            with tenant_context(company):
+                # Never a second VEHICLE center: the cost engine maps one per vehicle
+                vehicle_centers = CostCenter.objects.filter(type='VEHICLE', vehicle_id=instance.pk)
+                if not vehicle_centers.exists():
+                    defaults.update(type='VEHICLE', vehicle_id=instance.pk)
+                # unique_together(company, name) guards races
+                CostCenter.objects.get_or_create(name=cost_center_name, defaults=defaults)
+        
+        transaction.on_commit(create_cost_center)
 
 
-# Placeholder for future maintenance alert system
-def check_upcoming_maintenance(vehicle):
+def drop_cost_summary_before_migrate(sender, using=DEFAULT_DB_ALIAS, **kwargs):
     """
-    Future implementation: Check if vehicle is due for maintenance
-    based on current odometer reading and service history
+    pre_migrate (connected in OperationsConfig.ready): drop vehicle_cost_summary
     
-    Logic:
-    - Check last service date and mileage
-    - Calculate next service due (e.g., every 10,000 km or 6 months)
-    - Send alert if due within 14 days or 500 km
+    No migration then runs with a view over the operations tables, so
+    AlterField/RemoveField on Vehicle, FuelEntry, ServiceLog or
+    IncidentReport needs no manual drop/recreate.
+    """
+    drop_vehicle_cost_summary(using)
+
+
+def create_cost_summary_after_migrate(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """
+    post_migrate (connected in OperationsConfig.ready): recreate vehicle_cost_summary
+    from the current SUMMARY_SELECT (skipped while its tables don't exist)
     """
-    pass
+    create_vehicle_cost_summary(using)
@@ -3,8 +3,16 @@
 Text File Normalization Script
 Removes hidden Unicode characters and enforces LF line endings
 """
+import argparse
+import json
+import mmap
 import os
+import re
+import shutil
 import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 
 
 # Hidden Unicode characters to remove
@@ -23,6 +31,44 @@ HIDDEN_CHARS = [
     '\ufeff',  # ZERO WIDTH NO-BREAK SPACE (BOM)
 ]
 
+# Byte-level replacements (fixed UTF-8 encodings)
+BYTE_REPLACEMENTS = (
+    [(char.encode('utf-8'), b'') for char in HIDDEN_CHARS]
+    + [('\u00A0'.encode('utf-8'), b' ')]
+)
+
+# CRLF and lone CR -> LF in one scan
+NEWLINE_BYTES_RE = re.compile(b'\r\n?')
+
+# UTF-8 lead bytes of every character normalize_file() rewrites:
+# 0xE2 (U+200E/F, U+202A-E, U+2066-9), 0xEF (BOM), 0xC2 (NBSP), plus CR.
+# A file containing none of them is already normalized.
+TRIGGER_BYTES = (b'\r', b'\xc2', b'\xe2', b'\xef')
+
+# Files at least this large are quick-checked through mmap (no read() copy)
+MMAP_MIN_SIZE = 1024 * 1024
+
+# Directories --glob never descends into: VCS metadata, environments,
+# caches, vendored packages and user uploads
+PRUNED_DIRS = frozenset({
+    '.git', '.hg', '.svn',
+    '.venv', 'venv', 'env', '.tox', '.nox',
+    '__pycache__', '.pytest_cache', '.mypy_cache', '.ruff_cache',
+    'node_modules', 'media', 'staticfiles',
+})
+
+# Below this many files a process pool costs more to start than it saves
+PARALLEL_MIN_FILES = 32
+
+# filepath -> [mtime_ns, size] of files already in canonical form
+CACHE_FILE = '.normalize_cache.json'
+
+# normalize_file() results; only FAILED files are left out of the cache
+MODIFIED = 'modified'
+UNCHANGED = 'unchanged'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
 
 def normalize_file(filepath):
     """
@@ -32,56 +78,167 @@ def normalize_file(filepath):
     - Enforce LF line endings
     - Ensure UTF-8 encoding (no BOM)
     
+    Binary (NUL bytes) and non-UTF-8 files are never rewritten: a CR or
+    0xC2/0xE2/0xEF byte there is data, not a line ending or hidden mark.
+    
     Args:
         filepath: Path to the file to normalize
     
     Returns:
-        bool: True if file was modified, False otherwise
+        str: MODIFIED, UNCHANGED, SKIPPED (binary or not UTF-8), or FAILED
+        if the file could not be read or written
     """
     try:
         # Read file as bytes
         with open(filepath, 'rb') as f:
-            raw_bytes = f.read()
+            if os.fstat(f.fileno()).st_size >= MMAP_MIN_SIZE:
+                # Large file: scan the page cache directly, copy only if needed
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    if all(mm.find(trigger) == -1 for trigger in TRIGGER_BYTES):
+                        return UNCHANGED
+                    raw_bytes = mm[:]
+            else:
+                raw_bytes = f.read()
+        
+        # Quick check: skip decode + replace passes for clean files
+        if not any(trigger in raw_bytes for trigger in TRIGGER_BYTES):
+            return UNCHANGED
         
-        # Decode with error handling
+        # Only text is rewritten; validated here, after the quick check
+        if b'\0' in raw_bytes:
+            return SKIPPED
         try:
-            content = raw_bytes.decode('utf-8')
+            raw_bytes.decode('utf-8')
         except UnicodeDecodeError:
-            content = raw_bytes.decode('utf-8', errors='replace')
-            print(f"  WARNING: {filepath} had encoding errors (replaced)")
-        
-        original_content = content
-        
-        # Remove hidden Unicode characters
-        for char in HIDDEN_CHARS:
-            content = content.replace(char, '')
+            return SKIPPED
         
-        # Replace NBSP with regular space
-        content = content.replace('\u00A0', ' ')
-        
-        # Normalize line endings to LF
-        content = content.replace('\r\n', '\n')
-        content = content.replace('\r', '\n')
+        # Work on the raw bytes: no decode/re-encode for valid UTF-8
+        content = raw_bytes
+        for old, new in BYTE_REPLACEMENTS:
+            content = content.replace(old, new)
+        if b'\r' in content:
+            content = NEWLINE_BYTES_RE.sub(b'\n', content)
         
         # Check if file was modified
-        if content == original_content:
-            return False
+        if content == raw_bytes:
+            return UNCHANGED
         
-        # Write back as UTF-8 (no BOM) with LF line endings
-        with open(filepath, 'w', encoding='utf-8', newline='\n') as f:
-            f.write(content)
+        # Write back as UTF-8 (no BOM) with LF line endings:
+        # temp file + rename, so an interrupted run never leaves a truncated file.
+        # mkstemp picks an unused name, so an existing foo.txt.tmp or a
+        # concurrent run is never clobbered; only our own temp file is removed.
+        fd, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(filepath) or '.',
+            prefix=f".{os.path.basename(filepath)}.",
+            suffix='.tmp'
+        )
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            shutil.copymode(filepath, tmp_path)
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
         
-        return True
+        return MODIFIED
         
     except Exception as e:
         print(f"  ERROR processing {filepath}: {e}")
-        return False
+        return FAILED
+
+
+def normalize_files(files):
+    """
+    Normalize several files, in parallel for repo-wide runs
+    
+    Args:
+        files: List of existing file paths
+    
+    Returns:
+        list: normalize_file() result per file, in input order
+    """
+    if len(files) < PARALLEL_MIN_FILES:
+        return [normalize_file(filepath) for filepath in files]
+    
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        return list(executor.map(normalize_file, files, chunksize=16))
+
+
+def find_files(pattern, root='.'):
+    """
+    Recursive match for --glob, like Path.rglob but pruning PRUNED_DIRS
+    
+    Args:
+        pattern: Glob pattern matched against each file's relative path
+        root: Directory to walk
+    
+    Returns:
+        list: Sorted relative paths of matching files
+    """
+    matches = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [
+            name for name in dirnames
+            if name not in PRUNED_DIRS and not name.endswith('.egg-info')
+        ]
+        for name in filenames:
+            path = os.path.relpath(os.path.join(dirpath, name), root)
+            if Path(path).match(pattern):
+                matches.append(path)
+    return sorted(matches)
+
+
+def _stat_key(filepath):
+    """
+    Cache key for a file: [mtime_ns, size]
+    """
+    st = os.stat(filepath)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def load_cache():
+    """
+    Load the normalization cache (empty if missing or unreadable)
+    
+    Returns:
+        dict: filepath -> [mtime_ns, size]
+    """
+    try:
+        with open(CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_cache(cache):
+    """
+    Persist the normalization cache
+    
+    Args:
+        cache: dict of filepath -> [mtime_ns, size]
+    """
+    with open(CACHE_FILE, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, sort_keys=True)
 
 
 def main():
     """
     Main function to normalize target files
     """
+    parser = argparse.ArgumentParser(description="Normalize text files (hidden Unicode, NBSP, line endings)")
+    parser.add_argument(
+        '--glob',
+        help="Normalize every file matching this pattern recursively (e.g. '*.py') instead of the default targets; "
+             "VCS, environment and vendor directories are skipped"
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help=f"Re-scan every file, ignoring {CACHE_FILE}"
+    )
+    args = parser.parse_args()
+    
     # Target files to normalize
     target_files = [
         'core/middleware.py',
@@ -92,6 +249,9 @@ def main():
         '.gitattributes',
     ]
     
+    if args.glob:
+        target_files = find_files(args.glob)
+    
     print("=" * 60)
     print("TEXT FILE NORMALIZATION")
     print("=" * 60)
@@ -109,20 +269,43 @@ def main():
     skipped_count = 0
     error_count = 0
     
+    cache = {} if args.no_cache else load_cache()
+    
+    files = []
     for filepath in target_files:
         if not os.path.exists(filepath):
             print(f"SKIP: {filepath} (not found)")
             skipped_count += 1
             continue
         
+        # Unchanged since the last run: already canonical, skip without reading
+        if cache.get(filepath) == _stat_key(filepath):
+            print(f"Processing: {filepath}")
+            print(f"  -> OK (unchanged since last run)")
+            continue
+        files.append(filepath)
+    
+    for filepath, result in zip(files, normalize_files(files)):
         print(f"Processing: {filepath}")
-        was_modified = normalize_file(filepath)
         
-        if was_modified:
+        if result == FAILED:
+            # Not cached: a failed file must be retried on the next run
+            print(f"  -> ERROR")
+            error_count += 1
+            continue
+        
+        if result == MODIFIED:
             print(f"  -> MODIFIED")
             modified_count += 1
+        elif result == SKIPPED:
+            print(f"  -> SKIP (binary or not UTF-8)")
+            skipped_count += 1
         else:
             print(f"  -> OK (no changes needed)")
+        
+        cache[filepath] = _stat_key(filepath)
+    
+    save_cache(cache)
     
     print()
     print("=" * 60)
@@ -133,6 +316,10 @@ def main():
     print(f"Errors:   {error_count}")
     print()
     
+    if error_count > 0:
+        print("Some files could not be normalized; they will be retried on the next run.")
+        return 1
+    
     if modified_count > 0:
         print("Files have been normalized successfully!")
         return 0
@@ -0,0 +1,118 @@
+"""
+Shared Test Fixtures
+Two-tenant cost engine graph reused by the cost engine test modules
+"""
+from datetime import date
+from decimal import Decimal
+from core.models import Company
+from finance.models import CostCenter, CostItem, CostPosting
+from operations.models import Vehicle
+
+
+class DualTenantFixturesMixin:
+    """
+    Builds the same graph for Company A and Company B in setUpTestData:
+    company, vehicle, VEHICLE cost center, cost item and one January 2026 posting
+
+    Subclasses that need more rows call super().setUpTestData() first.
+    Kept in Python rather than a loaddata JSON file: loaddata saves objects
+    one by one, while bulk_create needs a single INSERT per model.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        """
+        Create both tenants with one INSERT per model
+        """
+        super().setUpTestData()
+
+        cls.company_a, cls.company_b = Company.objects.bulk_create([
+            Company(
+                name="Company A",
+                tax_id="111111111",
+                address="Address A",
+                transport_type="FREIGHT"
+            ),
+            Company(
+                name="Company B",
+                tax_id="222222222",
+                address="Address B",
+                transport_type="FREIGHT"
+            ),
+        ])
+
+        cls.vehicle_a, cls.vehicle_b = Vehicle.all_objects.bulk_create([
+            Vehicle(
+                company=cls.company_a,
+                license_plate="AAA-1111",
+                make="Mercedes",
+                model="Actros",
+                vehicle_class="TRUCK",
+                body_type="CURTAIN",
+                fuel_type="DIESEL",
+                manufacturing_year=2020,
+                status="ACTIVE"
+            ),
+            Vehicle(
+                company=cls.company_b,
+                license_plate="BBB-2222",
+                make="Volvo",
+                model="FH16",
+                vehicle_class="TRUCK",
+                body_type="CURTAIN",
+                status="ACTIVE"
+            ),
+        ])
+
+        cls.center_a, cls.center_b = CostCenter.all_objects.bulk_create([
+            CostCenter(
+                company=cls.company_a,
+                name="Vehicle AAA-1111",
+                type='VEHICLE',
+                vehicle=cls.vehicle_a,
+                is_active=True
+            ),
+            CostCenter(
+                company=cls.company_b,
+                name="Vehicle BBB-2222",
+                type='VEHICLE',
+                vehicle=cls.vehicle_b,
+                is_active=True
+            ),
+        ])
+
+        cls.item_a, cls.item_b = CostItem.all_objects.bulk_create([
+            CostItem(
+                company=cls.company_a,
+                name="Insurance A",
+                category='FIXED',
+                unit='MONTH',
+                is_active=True
+            ),
+            CostItem(
+                company=cls.company_b,
+                name="Insurance B",
+                category='FIXED',
+                unit='MONTH',
+                is_active=True
+            ),
+        ])
+
+        cls.posting_a, cls.posting_b = CostPosting.all_objects.bulk_create([
+            CostPosting(
+                company=cls.company_a,
+                cost_center=cls.center_a,
+                cost_item=cls.item_a,
+                amount=Decimal('1000.00'),
+                period_start=date(2026, 1, 1),
+                period_end=date(2026, 1, 31)
+            ),
+            CostPosting(
+                company=cls.company_b,
+                cost_center=cls.center_b,
+                cost_item=cls.item_b,
+                amount=Decimal('1000.00'),
+                period_start=date(2026, 1, 1),
+                period_end=date(2026, 1, 31)
+            ),
+        ])
@@ -3,7 +3,8 @@ Admin Tenant Isolation Tests
 Ensures Django Admin respects multi-tenant architecture
 """
 from django.test import TestCase, Client
-from django.contrib.auth.models import User
+from django.contrib.auth.models import Permission, User
+from django.contrib.contenttypes.models import ContentType
 from django.urls import reverse
 from core.models import Company
 from accounts.models import UserProfile
@@ -19,54 +20,75 @@ class AdminTenantIsolationTestCase(TestCase):
     1. Non-superuser staff see only their company's records
     2. Superusers see all records
     3. Staff cannot modify other companies' records
+    4. Changelist search by license plate works
     """
     
-    def setUp(self):
+    # Admin answers an out-of-tenant object with a redirect, 403 or 404
+    REJECT_STATUSES = frozenset({302, 403, 404})
+    
+    @classmethod
+    def setUpTestData(cls):
         """
-        Set up test data: 2 companies, staff users, and records
+        Set up test data once per class: 2 companies, staff users, and records
         """
+        # Changelist URLs used by several tests
+        cls.expense_changelist_url = reverse('admin:finance_companyexpense_changelist')
+        cls.fuel_changelist_url = reverse('admin:operations_fuelentry_changelist')
+        
         # Create Company A
-        self.company_a = Company.objects.create(
+        cls.company_a = Company.objects.create(
             name="Company A",
             tax_id="111111111",
             transport_type="FREIGHT"
         )
         
         # Create Company B
-        self.company_b = Company.objects.create(
+        cls.company_b = Company.objects.create(
             name="Company B",
             tax_id="222222222",
             transport_type="FREIGHT"
         )
         
         # Create superuser
-        self.superuser = User.objects.create_superuser(
+        cls.superuser = User.objects.create_superuser(
             username='admin',
             email='admin@test.com',
             password='admin123'
         )
         
         # Create staff user for Company A
-        self.staff_a = User.objects.create_user(
+        cls.staff_a = User.objects.create_user(
             username='staff_a',
             password='staff123',
             is_staff=True
         )
         UserProfile.objects.create(
-            user=self.staff_a,
-            company=self.company_a,
+            user=cls.staff_a,
+            company=cls.company_a,
             role='MANAGER'
         )
         
+        # Grant admin view permissions up front (changelists 403 without them)
+        cls.staff_a.user_permissions.add(
+            Permission.objects.get(
+                content_type=ContentType.objects.get_for_model(CompanyExpense),
+                codename='view_companyexpense'
+            ),
+            Permission.objects.get(
+                content_type=ContentType.objects.get_for_model(FuelEntry),
+                codename='view_fuelentry'
+            ),
+        )
+        
         # Create staff user for Company B
-        self.staff_b = User.objects.create_user(
+        cls.staff_b = User.objects.create_user(
             username='staff_b',
             password='staff123',
             is_staff=True
         )
         UserProfile.objects.create(
-            user=self.staff_b,
-            company=self.company_b,
+            user=cls.staff_b,
+            company=cls.company_b,
             role='MANAGER'
         )
         
@@ -75,36 +97,37 @@ class AdminTenantIsolationTestCase(TestCase):
             name="Test Family",
             display_order=1
         )
-        self.category = ExpenseCategory.objects.create(
+        cls.category = ExpenseCategory.objects.create(
             family=family,
             name="Test Category",
             is_system_default=True
         )
         
         # Create expenses for both companies
-        self.expense_a = CompanyExpense.all_objects.create(
-            company=self.company_a,
-            category=self.category,
-            expense_type='MONTHLY',
-            periodicity='MONTHLY',
-            amount=1000.00,
-            start_date='2026-01-01',
-            description='Company A Expense'
-        )
-        
-        self.expense_b = CompanyExpense.all_objects.create(
-            company=self.company_b,
-            category=self.category,
-            expense_type='MONTHLY',
-            periodicity='MONTHLY',
-            amount=2000.00,
-            start_date='2026-01-01',
-            description='Company B Expense'
-        )
+        cls.expense_a, cls.expense_b = CompanyExpense.all_objects.bulk_create([
+            CompanyExpense(
+                company=cls.company_a,
+                category=cls.category,
+                expense_type='MONTHLY',
+                periodicity='MONTHLY',
+                amount=1000.00,
+                start_date='2026-01-01',
+                description='Company A Expense'
+            ),
+            CompanyExpense(
+                company=cls.company_b,
+                category=cls.category,
+                expense_type='MONTHLY',
+                periodicity='MONTHLY',
+                amount=2000.00,
+                start_date='2026-01-01',
+                description='Company B Expense'
+            ),
+        ])
         
         # Create vehicles for both companies
-        self.vehicle_a = Vehicle.objects.create(
-            company=self.company_a,
+        cls.vehicle_a = Vehicle.objects.create(
+            company=cls.company_a,
             license_plate="AAA-1111",
             make="Mercedes",
             model="Actros",
@@ -112,8 +135,8 @@ class AdminTenantIsolationTestCase(TestCase):
             body_type="BOX"
         )
         
-        self.vehicle_b = Vehicle.objects.create(
-            company=self.company_b,
+        cls.vehicle_b = Vehicle.objects.create(
+            company=cls.company_b,
             license_plate="BBB-2222",
             make="Volvo",
             model="FH16",
@@ -121,28 +144,32 @@ class AdminTenantIsolationTestCase(TestCase):
             body_type="CURTAIN"
         )
         
-        # Create fuel entries for both companies
-        self.fuel_a = FuelEntry.all_objects.create(
-            company=self.company_a,
-            vehicle=self.vehicle_a,
-            date='2026-02-01',
-            liters=100.00,
-            cost_per_liter=1.50,
-            total_cost=150.00,
-            odometer_reading=10000
-        )
-        
-        self.fuel_b = FuelEntry.all_objects.create(
-            company=self.company_b,
-            vehicle=self.vehicle_b,
-            date='2026-02-01',
-            liters=150.00,
-            cost_per_liter=1.52,
-            total_cost=228.00,
-            odometer_reading=20000
-        )
-        
-        # Create test client
+        # Create fuel entries for both companies (one INSERT, no odometer signals)
+        cls.fuel_a, cls.fuel_b = FuelEntry.all_objects.bulk_create([
+            FuelEntry(
+                company=cls.company_a,
+                vehicle=cls.vehicle_a,
+                date='2026-02-01',
+                liters=100.00,
+                cost_per_liter=1.50,
+                total_cost=150.00,
+                odometer_reading=10000
+            ),
+            FuelEntry(
+                company=cls.company_b,
+                vehicle=cls.vehicle_b,
+                date='2026-02-01',
+                liters=150.00,
+                cost_per_liter=1.52,
+                total_cost=228.00,
+                odometer_reading=20000
+            ),
+        ])
+    
+    def setUp(self):
+        """
+        Create a fresh test client (login state is per test)
+        """
         self.client = Client()
     
     def test_staff_sees_only_own_company_records(self):
@@ -153,53 +180,24 @@ class AdminTenantIsolationTestCase(TestCase):
         self.client.login(username='staff_a', password='staff123')
         
         # Access CompanyExpense changelist
-        response = self.client.get(reverse('admin:finance_companyexpense_changelist'))
+        response = self.client.get(self.expense_changelist_url)
         
-        # Staff users need proper permissions - if 403, they lack view permission
-        # This is expected if they don't have the right permissions
-        if response.status_code == 403:
-            # Grant view permission and retry
-            from django.contrib.auth.models import Permission
-            from django.contrib.contenttypes.models import ContentType
-            
-            ct = ContentType.objects.get_for_model(CompanyExpense)
-            perm = Permission.objects.get(content_type=ct, codename='view_companyexpense')
-            self.staff_a.user_permissions.add(perm)
-            
-            response = self.client.get(reverse('admin:finance_companyexpense_changelist'))
-        
-        self.assertEqual(response.status_code, 200)
-        
-        # Verify only Company A expense is visible
-        content = response.content.decode('utf-8')
-        self.assertIn('Company A', content)
-        self.assertNotIn('Company B Expense', content)
+        # Verify only Company A expense is visible (assertContains also checks 200)
+        self.assertContains(response, 'Company A')
+        self.assertNotContains(response, 'Company B Expense')
         
         # Access FuelEntry changelist
-        response = self.client.get(reverse('admin:operations_fuelentry_changelist'))
-        
-        if response.status_code == 403:
-            from django.contrib.auth.models import Permission
-            from django.contrib.contenttypes.models import ContentType
-            
-            ct = ContentType.objects.get_for_model(FuelEntry)
-            perm = Permission.objects.get(content_type=ct, codename='view_fuelentry')
-            self.staff_a.user_permissions.add(perm)
-            
-            response = self.client.get(reverse('admin:operations_fuelentry_changelist'))
-        
-        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.fuel_changelist_url)
         
         # Verify only Company A fuel entry is visible in the table
         # Note: BBB-2222 may appear in the filter sidebar, but not in the results table
-        content = response.content.decode('utf-8')
-        self.assertIn('AAA-1111', content)
+        self.assertContains(response, 'AAA-1111')
         
         # Check that only 1 fuel entry is shown (not 2)
         # The page should show "1 Καταχώρηση Καυσίμου" not "2"
-        self.assertIn('1', content)
-        self.assertNotIn('2 Καταχώρηση Καυσίμου', content)
-        self.assertNotIn('2 Καταχωρήσεις Καυσίμων', content)
+        self.assertContains(response, '1')
+        self.assertNotContains(response, '2 Καταχώρηση Καυσίμου')
+        self.assertNotContains(response, '2 Καταχωρήσεις Καυσίμων')
     
     def test_superuser_sees_all_records(self):
         """
@@ -209,22 +207,33 @@ class AdminTenantIsolationTestCase(TestCase):
         self.client.login(username='admin', password='admin123')
         
         # Access CompanyExpense changelist
-        response = self.client.get(reverse('admin:finance_companyexpense_changelist'))
-        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.expense_changelist_url)
         
         # Verify both companies' expenses are visible
-        content = response.content.decode('utf-8')
-        self.assertIn('Company A', content)
-        self.assertIn('Company B', content)
+        self.assertContains(response, 'Company A')
+        self.assertContains(response, 'Company B')
         
         # Access FuelEntry changelist
-        response = self.client.get(reverse('admin:operations_fuelentry_changelist'))
-        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.fuel_changelist_url)
         
         # Verify both companies' fuel entries are visible
-        content = response.content.decode('utf-8')
-        self.assertIn('AAA-1111', content)
-        self.assertIn('BBB-2222', content)
+        self.assertContains(response, 'AAA-1111')
+        self.assertContains(response, 'BBB-2222')
+    
+    def test_superuser_can_search_fuel_entries_by_plate(self):
+        """
+        Test that FuelEntry admin search resolves the vehicle's license_plate
+        """
+        self.client.login(username='admin', password='admin123')
+        
+        response = self.client.get(
+            self.fuel_changelist_url, {'q': 'AAA-1111'}
+        )
+        self.assertEqual(response.status_code, 200)
+        
+        # Search narrows the results table to Company A's entry
+        self.assertEqual(list(response.context['cl'].result_list), [self.fuel_a])
+        self.assertEqual(str(self.fuel_a), f"AAA-1111 - {self.fuel_a.date} - {self.fuel_a.liters}L")
     
     def test_staff_cannot_modify_other_company_records(self):
         """
@@ -239,7 +248,7 @@ class AdminTenantIsolationTestCase(TestCase):
         
         # Should get 302 (redirect) or 403 (forbidden) or 404 (not found)
         # Django admin typically returns 302 redirect to changelist when object not in queryset
-        self.assertIn(response.status_code, [302, 403, 404])
+        self.assertIn(response.status_code, self.REJECT_STATUSES)
         
         # Try to POST update to Company B expense
         response = self.client.post(url, {
@@ -253,7 +262,7 @@ class AdminTenantIsolationTestCase(TestCase):
         })
         
         # Should be rejected
-        self.assertIn(response.status_code, [302, 403, 404])
+        self.assertIn(response.status_code, self.REJECT_STATUSES)
         
         # Verify the expense was NOT modified
         self.expense_b.refresh_from_db()
@@ -264,7 +273,7 @@ class AdminTenantIsolationTestCase(TestCase):
         response = self.client.get(url)
         
         # Should get 302, 403, or 404
-        self.assertIn(response.status_code, [302, 403, 404])
+        self.assertIn(response.status_code, self.REJECT_STATUSES)
     
     def tearDown(self):
         """
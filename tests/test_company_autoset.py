@@ -22,17 +22,18 @@ class CompanyAutoAssignmentTestCase(TestCase):
     5. Outside context, explicit company is still required
     """
     
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
         """
-        Set up test data: companies
+        Set up test data once per class: companies
         """
-        self.company_a = Company.objects.create(
+        cls.company_a = Company.objects.create(
             name="Company A",
             tax_id="111111111",
             transport_type="FREIGHT"
         )
         
-        self.company_b = Company.objects.create(
+        cls.company_b = Company.objects.create(
             name="Company B",
             tax_id="222222222",
             transport_type="FREIGHT"
@@ -79,6 +80,22 @@ class CompanyAutoAssignmentTestCase(TestCase):
                 item.refresh_from_db()
                 self.assertEqual(item.company, self.company_a)
     
+    def test_bulk_create_accepts_generator(self):
+        """
+        Test that bulk_create() assigns company to every row of a generator
+        """
+        with tenant_context(self.company_a):
+            created_items = CostItem.objects.bulk_create(
+                CostItem(name=f"Item {i}", category='FIXED', unit='MONTH')
+                for i in range(3)
+            )
+        
+        self.assertEqual(len(created_items), 3)
+        self.assertEqual(
+            CostItem.all_objects.filter(company=self.company_a).count(),
+            3
+        )
+    
     def test_get_or_create_auto_assigns_company(self):
         """
         Test that get_or_create() auto-assigns company
@@ -5,9 +5,10 @@ Verifies that:
 - Valid 9-digit tax_id passes
 - Non-digit characters fail
 - Wrong length fails
-- POST /settings/company/ with invalid tax_id returns form error (not saved)
+- Invalid tax_id on an existing company is rejected (not saved)
+- POST /settings/company/ with a valid tax_id saves
 """
-from django.test import TestCase, Client
+from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth.models import User
 from core.models import Company
@@ -15,18 +16,21 @@ from accounts.models import UserProfile
 from web.forms import CompanyForm
 
 
+# Invariant form fields; each test varies only tax_id (and, in view POSTs, name)
+_BASE_DATA = {
+    'name': 'Test Company',
+    'transport_type': 'FREIGHT',
+    'address': '',
+    'phone': '',
+    'email': '',
+}
+
+
 class CompanyFormTaxIdValidationTest(TestCase):
     """Unit tests for CompanyForm.clean_tax_id()"""
 
     def _make_form(self, tax_id):
-        return CompanyForm(data={
-            'name': 'Test Company',
-            'transport_type': 'FREIGHT',
-            'tax_id': tax_id,
-            'address': '',
-            'phone': '',
-            'email': '',
-        })
+        return CompanyForm(data={**_BASE_DATA, 'tax_id': tax_id})
 
     def test_valid_9_digit_tax_id_passes(self):
         form = self._make_form('123456789')
@@ -56,82 +60,70 @@ class CompanyFormTaxIdValidationTest(TestCase):
 
 
 class CompanyEditViewTaxIdValidationTest(TestCase):
-    """Integration test: POST /settings/company/ with invalid tax_id."""
+    """
+    POST /settings/company/ tax_id handling.
 
-    def setUp(self):
-        self.company = Company.objects.create(
+    Rejections go through the view, so "not saved" is checked against the
+    database after a real POST rather than an unsaved, invalid form.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.company = Company.objects.create(
             name='My Company',
             tax_id='111111111',
             transport_type='FREIGHT',
         )
-        self.user = User.objects.create_user(
+        cls.user = User.objects.create_user(
             username='settings_user',
             password='testpass123',
         )
         UserProfile.objects.create(
-            user=self.user,
-            company=self.company,
+            user=cls.user,
+            company=cls.company,
             role='ADMIN',
         )
-        self.client = Client()
+
+    def _make_form(self, tax_id):
+        return CompanyForm(data={**_BASE_DATA, 'tax_id': tax_id}, instance=self.company)
+
+    def _post(self, name, tax_id):
         self.client.login(username='settings_user', password='testpass123')
+        return self.client.post(reverse('web:company_edit'), {**_BASE_DATA, 'name': name, 'tax_id': tax_id})
 
     def test_invalid_tax_id_does_not_save(self):
-        """POST with non-digit tax_id → company not updated."""
-        self.client.post(reverse('web:company_edit'), {
-            'name': 'My Company',
-            'transport_type': 'FREIGHT',
-            'tax_id': 'INVALID!!',
-            'address': '',
-            'phone': '',
-            'email': '',
-        })
+        """POST with non-digit tax_id → nothing saved, not even the new name."""
+        self._post('My Company Updated', 'INVALID!!')
         self.company.refresh_from_db()
+        self.assertEqual(self.company.name, 'My Company')
         self.assertEqual(self.company.tax_id, '111111111')
 
     def test_valid_tax_id_saves(self):
         """POST with valid 9-digit tax_id → company updated (same value)."""
-        self.client.post(reverse('web:company_edit'), {
-            'name': 'My Company Updated',
-            'transport_type': 'FREIGHT',
-            'tax_id': '111111111',  # same as existing
-            'address': '',
-            'phone': '',
-            'email': '',
-        })
+        self._post('My Company Updated', '111111111')  # same as existing
         self.company.refresh_from_db()
         self.assertEqual(self.company.name, 'My Company Updated')
         self.assertEqual(self.company.tax_id, '111111111')
 
     def test_cannot_change_tax_id_once_set(self):
-        """POST with different tax_id → company.tax_id unchanged, form error."""
-        self.client.post(reverse('web:company_edit'), {
-            'name': 'My Company',
-            'transport_type': 'FREIGHT',
-            'tax_id': '987654321',  # different from existing '111111111'
-            'address': '',
-            'phone': '',
-            'email': '',
-        })
+        """Different tax_id → form error; POST leaves the company unchanged."""
+        form = self._make_form('987654321')  # different from existing '111111111'
+        self.assertFalse(form.is_valid())
+        self.assertIn('tax_id', form.errors)
+
+        self._post('My Company Updated', '987654321')
         self.company.refresh_from_db()
+        self.assertEqual(self.company.name, 'My Company')
         self.assertEqual(self.company.tax_id, '111111111')
 
     def test_resubmitting_same_tax_id_with_spaces_passes(self):
-        """POST with same tax_id but with whitespace → allowed after trim."""
-        self.client.post(reverse('web:company_edit'), {
-            'name': 'My Company',
-            'transport_type': 'FREIGHT',
-            'tax_id': '  111111111  ',  # same value with spaces
-            'address': '',
-            'phone': '',
-            'email': '',
-        })
+        """Same tax_id with whitespace → allowed after trim."""
+        form = self._make_form('  111111111  ')  # same value with spaces
+        self.assertTrue(form.is_valid(), form.errors)
+        form.save()
         self.company.refresh_from_db()
         self.assertEqual(self.company.tax_id, '111111111')
 
-    def tearDown(self):
-        self.client.logout()
-
 
 class CompanyFormImmutabilityUnitTest(TestCase):
     """Unit tests for tax_id immutability in CompanyForm."""
@@ -144,17 +136,7 @@ class CompanyFormImmutabilityUnitTest(TestCase):
         )
 
     def _make_form(self, tax_id):
-        return CompanyForm(
-            data={
-                'name': 'Existing Co',
-                'transport_type': 'FREIGHT',
-                'tax_id': tax_id,
-                'address': '',
-                'phone': '',
-                'email': '',
-            },
-            instance=self.company,
-        )
+        return CompanyForm(data={**_BASE_DATA, 'tax_id': tax_id}, instance=self.company)
 
     def test_same_tax_id_passes(self):
         form = self._make_form('123456789')
@@ -2,139 +2,193 @@
 Tests for Cost Engine API
 """
 from datetime import date
+from types import MappingProxyType
 from decimal import Decimal
 from django.test import TestCase
 from django.contrib.auth.models import User
 from rest_framework.test import APIClient
 
-from core.models import Company
 from core.tenant_context import tenant_context
 from operations.models import Vehicle
-from finance.models import CostCenter, CostItem, CostPosting, TransportOrder
+from finance.models import CostCenter, CostPosting, TransportOrder
+from tests.fixtures import DualTenantFixturesMixin
 
 
-class TestCostEngineAPI(TestCase):
-    """Test suite for Cost Engine API endpoints"""
+# Reporting period shared by every request in this module. Read-only because
+# every test in the process sees this one object: an in-place edit would
+# leak into later tests, so build variants with {**PERIOD, ...} instead.
+PERIOD = MappingProxyType({'period_start': '2026-01-01', 'period_end': '2026-01-31'})
+
+
+class TestCostEngineAPIPermissions(TestCase):
+    """
+    Permission and parameter validation tests (rejected before any data is read)
     
-    def setUp(self):
-        """Set up test data"""
-        # Create companies
-        self.company_a = Company.objects.create(
-            name="Company A",
-            tax_id="111111111",
-            address="Address A"
-        )
-        
-        self.company_b = Company.objects.create(
-            name="Company B",
-            tax_id="222222222",
-            address="Address B"
-        )
-        
-        # Create users
-        self.superuser = User.objects.create_superuser(
-            username='admin',
-            email='admin@test.com',
-            password='admin123'
-        )
-        
-        self.staff_user = User.objects.create_user(
+    Keep tests here when they never touch company data; the fixture-bearing
+    TestCostEngineAPI builds vehicles, postings and orders for its class.
+    """
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Only the users are needed; no company data"""
+        cls.staff_user = User.objects.create_user(
             username='staff',
             email='staff@test.com',
             password='staff123',
             is_staff=True
         )
         
-        self.regular_user = User.objects.create_user(
+        cls.regular_user = User.objects.create_user(
             username='regular',
             email='regular@test.com',
             password='regular123'
         )
         
-        # Create demo data for company_a
-        with tenant_context(self.company_a):
-            self.vehicle_a = Vehicle.objects.create(
-                company=self.company_a,
-                license_plate='TEST-A-001',
-                make='Mercedes',
-                model='Actros',
-                vehicle_class='TRUCK',
-                body_type='CURTAIN',
-                fuel_type='DIESEL',
-                manufacturing_year=2020,
-                status='ACTIVE'
-            )
-            
-            self.vehicle_cc_a = CostCenter.objects.create(
-                company=self.company_a,
-                name='CC-TEST-A-001',
-                type='VEHICLE',
-                vehicle=self.vehicle_a,
-                is_active=True
-            )
-            
-            self.cost_item_a = CostItem.objects.create(
-                company=self.company_a,
-                name='Test Cost Item A',
-                category='FIXED',
-                unit='MONTH',
-                is_active=True
-            )
-            
-            self.posting_a = CostPosting.objects.create(
-                company=self.company_a,
-                cost_center=self.vehicle_cc_a,
-                cost_item=self.cost_item_a,
-                amount=Decimal('1000.00'),
-                period_start=date(2026, 1, 1),
-                period_end=date(2026, 1, 31)
-            )
-            
-            self.order_a = TransportOrder.objects.create(
-                company=self.company_a,
-                customer_name='Test Customer A',
-                date=date(2026, 1, 15),
-                origin='Athens',
-                destination='Thessaloniki',
-                distance_km=Decimal('500.00'),
-                agreed_price=Decimal('2000.00'),
-                assigned_vehicle=self.vehicle_a,
-                status='COMPLETED'
-            )
-        
-        self.client = APIClient()
+        cls.superuser = User.objects.create_superuser(
+            username='admin',
+            email='admin@test.com',
+            password='admin123'
+        )
+    
+    @classmethod
+    def setUpClass(cls):
+        """Pre-authenticated clients, shared by all tests (GET-only, no session state)"""
+        super().setUpClass()
+        cls.client_anon = APIClient()
+        cls.client_staff = APIClient()
+        cls.client_staff.force_authenticate(user=cls.staff_user)
+        cls.client_regular = APIClient()
+        cls.client_regular.force_authenticate(user=cls.regular_user)
+        cls.client_super = APIClient()
+        cls.client_super.force_authenticate(user=cls.superuser)
     
     def test_unauthenticated_request_returns_403(self):
         """Test that unauthenticated requests are rejected"""
-        response = self.client.get(
-            '/api/v1/cost-engine/run/',
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31'}
-        )
+        response = self.client_anon.get('/api/v1/cost-engine/run/', PERIOD)
         # DRF returns 401 when JWTAuthentication is the first authenticator
         # and no credentials are provided. Both 401 and 403 indicate rejection.
         self.assertIn(response.status_code, [401, 403])
     
     def test_non_staff_user_returns_403(self):
         """Test that non-staff users are rejected"""
-        self.client.force_authenticate(user=self.regular_user)
-        response = self.client.get(
+        response = self.client_regular.get('/api/v1/cost-engine/run/', PERIOD)
+        self.assertEqual(response.status_code, 403)
+    
+    def test_bad_request_parameters_return_400(self):
+        """Test that missing, malformed or inverted periods return 400"""
+        cases = [
+            {},
+            {'period_start': '2026-01-01'},
+            {'period_end': '2026-01-31'},
+            {'period_start': '01/01/2026', 'period_end': '31/01/2026'},
+            {'period_start': '2026-01-31', 'period_end': '2026-01-01'},
+        ]
+        for params in cases:
+            with self.subTest(params=params):
+                response = self.client_staff.get('/api/v1/cost-engine/run/', params)
+                self.assertEqual(response.status_code, 400)
+    
+    def test_non_superuser_cannot_specify_company_id(self):
+        """Test that non-superuser cannot specify company_id"""
+        # Rejected before the company lookup, so no Company row is needed
+        response = self.client_staff.get(
             '/api/v1/cost-engine/run/',
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31'}
+            {
+                **PERIOD,
+                'company_id': '1'
+            }
         )
         self.assertEqual(response.status_code, 403)
     
+    def test_invalid_company_id_returns_404(self):
+        """Test that invalid company_id returns 404"""
+        response = self.client_super.get(
+            '/api/v1/cost-engine/run/',
+            {
+                **PERIOD,
+                'company_id': '99999'
+            }
+        )
+        self.assertEqual(response.status_code, 404)
+
+
+class TestCostEngineAPI(DualTenantFixturesMixin, TestCase):
+    """Test suite for Cost Engine API endpoints"""
+    
+    # Shared unfiltered response, see get_baseline_data()
+    _baseline_data = None
+    
+    @classmethod
+    def setUpTestData(cls):
+        """Users and an order on top of the shared two-tenant graph"""
+        cls._baseline_data = None
+        
+        super().setUpTestData()
+        cls.company_a_id_str = str(cls.company_a.id)
+        
+        # Create users
+        cls.superuser = User.objects.create_superuser(
+            username='admin',
+            email='admin@test.com',
+            password='admin123'
+        )
+        
+        cls.staff_user = User.objects.create_user(
+            username='staff',
+            email='staff@test.com',
+            password='staff123',
+            is_staff=True
+        )
+        
+        # Completed order for vehicle_a (the rest of the graph comes from the mixin)
+        cls.order_a = TransportOrder.all_objects.create(
+            company=cls.company_a,
+            customer_name='Test Customer A',
+            date=date(2026, 1, 15),
+            origin='Athens',
+            destination='Thessaloniki',
+            distance_km=Decimal('500.00'),
+            agreed_price=Decimal('2000.00'),
+            assigned_vehicle=cls.vehicle_a,
+            status='COMPLETED'
+        )
+    
+    @classmethod
+    def setUpClass(cls):
+        """Pre-authenticated clients, shared by all tests (GET-only, no session state)"""
+        super().setUpClass()
+        cls.client_staff = APIClient()
+        cls.client_staff.force_authenticate(user=cls.staff_user)
+        cls.client_super = APIClient()
+        cls.client_super.force_authenticate(user=cls.superuser)
+    
+    def get_baseline_data(self):
+        """
+        Unfiltered run for company_a as superuser, computed once per class
+        
+        Every test starts from the same setUpTestData rows, so the JSON is
+        identical across tests and can be shared.
+        """
+        cls = type(self)
+        if cls._baseline_data is None:
+            response = self.client_super.get(
+                '/api/v1/cost-engine/run/',
+                {**PERIOD, 'company_id': self.company_a_id_str}
+            )
+            self.assertEqual(response.status_code, 200)
+            cls._baseline_data = response.json()
+        return cls._baseline_data
+    
     def test_staff_user_can_access_endpoint(self):
         """Test that staff users can access the endpoint"""
-        self.client.force_authenticate(user=self.staff_user)
-        response = self.client.get(
+        response = self.client_staff.get(
             '/api/v1/cost-engine/run/',
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31', 'company_id': str(self.company_a.id)}
+            {**PERIOD, 'company_id': self.company_a_id_str}
         )
         # Staff user cannot specify company_id, so use superuser instead
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
+        response = self.client_super.get(
             '/api/v1/cost-engine/run/',
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31', 'company_id': str(self.company_a.id)}
+            {**PERIOD, 'company_id': self.company_a_id_str}
         )
         self.assertEqual(response.status_code, 200)
         
@@ -145,66 +199,18 @@ class TestCostEngineAPI(TestCase):
         self.assertIn('breakdowns', data)
         self.assertIn('summary', data)
     
-    def test_missing_period_parameters_returns_400(self):
-        """Test that missing period parameters return 400"""
-        self.client.force_authenticate(user=self.staff_user)
-        
-        # Missing both
-        response = self.client.get('/api/v1/cost-engine/run/')
-        self.assertEqual(response.status_code, 400)
-        
-        # Missing period_end
-        response = self.client.get(
-            '/api/v1/cost-engine/run/',
-            {'period_start': '2026-01-01'}
-        )
-        self.assertEqual(response.status_code, 400)
-        
-        # Missing period_start
-        response = self.client.get(
-            '/api/v1/cost-engine/run/',
-            {'period_end': '2026-01-31'}
-        )
-        self.assertEqual(response.status_code, 400)
-    
-    def test_invalid_date_format_returns_400(self):
-        """Test that invalid date format returns 400"""
-        self.client.force_authenticate(user=self.staff_user)
-        response = self.client.get(
-            '/api/v1/cost-engine/run/',
-            {'period_start': '01/01/2026', 'period_end': '31/01/2026'}
-        )
-        self.assertEqual(response.status_code, 400)
-    
-    def test_invalid_date_range_returns_400(self):
-        """Test that invalid date range returns 400"""
-        self.client.force_authenticate(user=self.staff_user)
-        response = self.client.get(
-            '/api/v1/cost-engine/run/',
-            {'period_start': '2026-01-31', 'period_end': '2026-01-01'}
-        )
-        self.assertEqual(response.status_code, 400)
-    
     def test_only_nonzero_filter(self):
         """Test only_nonzero parameter filters snapshots"""
-        self.client.force_authenticate(user=self.superuser)
-        
         # Without filter
-        response = self.client.get(
-            '/api/v1/cost-engine/run/',
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31', 'company_id': str(self.company_a.id)}
-        )
-        self.assertEqual(response.status_code, 200)
-        data_all = response.json()
+        data_all = self.get_baseline_data()
         total_snapshots = len(data_all.get('snapshots', []))
         
         # With filter
-        response = self.client.get(
+        response = self.client_super.get(
             '/api/v1/cost-engine/run/',
             {
-                'period_start': '2026-01-01',
-                'period_end': '2026-01-31',
-                'company_id': str(self.company_a.id),
+                **PERIOD,
+                'company_id': self.company_a_id_str,
                 'only_nonzero': '1'
             }
         )
@@ -216,33 +222,27 @@ class TestCostEngineAPI(TestCase):
         self.assertLessEqual(filtered_snapshots, total_snapshots)
         
         # All filtered snapshots should have total_cost > 0 OR rate > 0
+        # (sign check only: float() on the JSON value is exact enough)
         for snap in data_filtered.get('snapshots', []):
-            total_cost = Decimal(str(snap.get('total_cost', 0)))
-            rate = Decimal(str(snap.get('rate', 0)))
+            total_cost = float(snap.get('total_cost') or 0)
+            rate = float(snap.get('rate') or 0)
             self.assertTrue(
-                total_cost > Decimal('0') or rate > Decimal('0'),
+                total_cost > 0 or rate > 0,
                 f"Snapshot {snap.get('cost_center_id')} has zero cost and rate"
             )
     
     def test_include_breakdowns_parameter(self):
         """Test include_breakdowns parameter"""
-        self.client.force_authenticate(user=self.superuser)
-        
         # With breakdowns (default)
-        response = self.client.get(
-            '/api/v1/cost-engine/run/',
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31', 'company_id': str(self.company_a.id)}
-        )
-        self.assertEqual(response.status_code, 200)
-        data_with = response.json()
+        data_with = self.get_baseline_data()
+        self.assertIn('breakdowns', data_with)
         
         # Without breakdowns
-        response = self.client.get(
+        response = self.client_super.get(
             '/api/v1/cost-engine/run/',
             {
-                'period_start': '2026-01-01',
-                'period_end': '2026-01-31',
-                'company_id': str(self.company_a.id),
+                **PERIOD,
+                'company_id': self.company_a_id_str,
                 'include_breakdowns': '0'
             }
         )
@@ -254,41 +254,62 @@ class TestCostEngineAPI(TestCase):
     
     def test_superuser_can_specify_company_id(self):
         """Test that superuser can specify company_id"""
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
+        response = self.client_super.get(
             '/api/v1/cost-engine/run/',
             {
-                'period_start': '2026-01-01',
-                'period_end': '2026-01-31',
-                'company_id': str(self.company_a.id)
+                **PERIOD,
+                'company_id': self.company_a_id_str
             }
         )
         self.assertEqual(response.status_code, 200)
         data = response.json()
         self.assertEqual(data['meta']['company_id'], self.company_a.id)
     
-    def test_non_superuser_cannot_specify_company_id(self):
-        """Test that non-superuser cannot specify company_id"""
-        self.client.force_authenticate(user=self.staff_user)
-        response = self.client.get(
-            '/api/v1/cost-engine/run/',
-            {
-                'period_start': '2026-01-01',
-                'period_end': '2026-01-31',
-                'company_id': str(self.company_a.id)
-            }
-        )
-        self.assertEqual(response.status_code, 403)
-    
-    def test_invalid_company_id_returns_404(self):
-        """Test that invalid company_id returns 404"""
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            '/api/v1/cost-engine/run/',
-            {
-                'period_start': '2026-01-01',
-                'period_end': '2026-01-31',
-                'company_id': '99999'
-            }
-        )
-        self.assertEqual(response.status_code, 404)
+    def test_query_count_independent_of_fleet_size(self):
+        """Test that the endpoint issues a fixed number of queries (no N+1 per vehicle)"""
+        with tenant_context(self.company_a):
+            for i in range(3):
+                vehicle = Vehicle.objects.create(
+                    license_plate=f'TEST-A-10{i}',
+                    make='Volvo',
+                    model='FH',
+                    vehicle_class='TRUCK',
+                    body_type='CURTAIN',
+                    status='ACTIVE'
+                )
+                cost_center = CostCenter.objects.create(
+                    name=f'CC-TEST-A-10{i}',
+                    type='VEHICLE',
+                    vehicle=vehicle,
+                    is_active=True
+                )
+                CostPosting.objects.create(
+                    cost_center=cost_center,
+                    cost_item=self.item_a,
+                    amount=Decimal('250.00'),
+                    period_start=date(2026, 1, 1),
+                    period_end=date(2026, 1, 31)
+                )
+                TransportOrder.objects.create(
+                    customer_name='Test Customer A',
+                    date=date(2026, 1, 20),
+                    origin='Athens',
+                    destination='Patra',
+                    distance_km=Decimal('200.00'),
+                    agreed_price=Decimal('800.00'),
+                    assigned_vehicle=vehicle,
+                    status='COMPLETED'
+                )
+        
+        # Company lookup + cost centers + orders + postings, however many vehicles
+        with self.assertNumQueries(4):
+            response = self.client_super.get(
+                '/api/v1/cost-engine/run/',
+                {
+                    **PERIOD,
+                    'company_id': self.company_a_id_str,
+                    'include_breakdowns': '1'
+                }
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['breakdowns']), 4)
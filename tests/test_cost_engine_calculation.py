@@ -2,7 +2,8 @@
 Cost Engine Calculation Tests
 Ensures cost calculation service respects tenant isolation and calculates correctly
 """
-from django.test import TestCase
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
 from decimal import Decimal
 from datetime import date
 from core.models import Company
@@ -12,6 +13,20 @@ from finance.services.cost_engine import calculate_company_costs
 from operations.models import Vehicle
 
 
+# Calculation period (February 2026)
+PERIOD_START = date(2026, 2, 1)
+PERIOD_END = date(2026, 2, 28)
+
+# Amounts shared by the fixtures and the assertions
+ZERO = Decimal('0.00')
+VEHICLE_COST_A = Decimal('2000.00')
+OVERHEAD_COST_A = Decimal('500.00')
+VEHICLE_COST_B = Decimal('999.00')
+
+# Breakdown components that add up to total_cost
+ALLOC_KEYS = ('vehicle_alloc', 'overhead_alloc', 'direct_cost', 'driver_alloc')
+
+
 class CostEngineCalculationTestCase(TestCase):
     """
     Test suite for cost engine calculations
@@ -20,129 +35,140 @@ class CostEngineCalculationTestCase(TestCase):
     1. Calculations respect tenant isolation
     2. Rates are calculated correctly
     3. Order breakdowns are accurate
-    4. Empty states are handled gracefully
+    4. The query count does not grow with the number of rows
+    
+    Empty and missing-activity states are covered without the database in
+    CostEngineLogicTestCase.
     """
     
-    def setUp(self):
+    # Shared results per company pk, see get_costs()
+    _costs_by_company = None
+    
+    @classmethod
+    def setUpTestData(cls):
         """
-        Set up test data: 2 companies with cost centers, postings, and orders
+        Set up test data once per class: 2 companies with cost centers, postings, and orders
         """
-        # Create Company A
-        self.company_a = Company.objects.create(
-            name="Company A",
-            tax_id="111111111",
-            transport_type="FREIGHT"
-        )
+        cls._costs_by_company = {}
         
-        # Create Company B
-        self.company_b = Company.objects.create(
-            name="Company B",
-            tax_id="222222222",
-            transport_type="FREIGHT"
-        )
+        # Create Company A and Company B (one INSERT)
+        cls.company_a, cls.company_b = Company.objects.bulk_create([
+            Company(
+                name="Company A",
+                tax_id="111111111",
+                transport_type="FREIGHT"
+            ),
+            Company(
+                name="Company B",
+                tax_id="222222222",
+                transport_type="FREIGHT"
+            ),
+        ])
         
-        # Period for calculations
-        self.period_start = date(2026, 2, 1)
-        self.period_end = date(2026, 2, 28)
-        
-        # Setup Company A data
-        with tenant_context(self.company_a):
-            # Create vehicle
-            self.vehicle_a = Vehicle.objects.create(
+        # Create both vehicles (one INSERT, explicit company)
+        cls.vehicle_a, cls.vehicle_b = Vehicle.all_objects.bulk_create([
+            Vehicle(
+                company=cls.company_a,
                 license_plate="AAA-1111",
                 make="Mercedes",
                 model="Actros",
                 vehicle_class="TRUCK",
                 body_type="BOX"
-            )
-            
-            # Create cost centers
-            self.vehicle_center_a = CostCenter.objects.create(
-                name="Vehicle AAA-1111",
-                type='VEHICLE',
-                vehicle=self.vehicle_a
-            )
-            
-            self.overhead_center_a = CostCenter.objects.create(
-                name="Overhead",
-                type='OVERHEAD'
-            )
-            
-            # Create cost items
-            self.leasing_item_a = CostItem.objects.create(
-                name="Leasing",
-                category='FIXED',
-                unit='MONTH'
-            )
-            
-            self.overhead_item_a = CostItem.objects.create(
-                name="Overhead",
-                category='INDIRECT',
-                unit='MONTH'
-            )
-            
-            # Create postings
-            # Vehicle: 2000€ for Feb
-            CostPosting.objects.create(
-                cost_center=self.vehicle_center_a,
-                cost_item=self.leasing_item_a,
-                amount=Decimal('2000.00'),
-                period_start=self.period_start,
-                period_end=self.period_end
-            )
-            
-            # Overhead: 500€ for Feb
-            CostPosting.objects.create(
-                cost_center=self.overhead_center_a,
-                cost_item=self.overhead_item_a,
-                amount=Decimal('500.00'),
-                period_start=self.period_start,
-                period_end=self.period_end
-            )
-            
-            # Create transport orders
-            # Order 1: 100km, 500€ revenue
-            TransportOrder.objects.create(
-                customer_name="Customer A1",
-                date=date(2026, 2, 15),
-                origin="Athens",
-                destination="Patras",
-                distance_km=Decimal('100.00'),
-                agreed_price=Decimal('500.00'),
-                assigned_vehicle=self.vehicle_a
-            )
-            
-            # Order 2: 300km, 1200€ revenue
-            TransportOrder.objects.create(
-                customer_name="Customer A2",
-                date=date(2026, 2, 20),
-                origin="Thessaloniki",
-                destination="Athens",
-                distance_km=Decimal('300.00'),
-                agreed_price=Decimal('1200.00'),
-                assigned_vehicle=self.vehicle_a
-            )
-        
-        # Setup Company B data
-        with tenant_context(self.company_b):
-            # Create vehicle
-            self.vehicle_b = Vehicle.objects.create(
+            ),
+            Vehicle(
+                company=cls.company_b,
                 license_plate="BBB-2222",
                 make="Volvo",
                 model="FH16",
                 vehicle_class="TRUCK",
                 body_type="CURTAIN"
-            )
-            
+            ),
+        ])
+        
+        # Setup Company A data
+        with tenant_context(cls.company_a):
+            # Create cost centers (one INSERT)
+            cls.vehicle_center_a, cls.overhead_center_a = CostCenter.objects.bulk_create([
+                CostCenter(
+                    name="Vehicle AAA-1111",
+                    type='VEHICLE',
+                    vehicle=cls.vehicle_a
+                ),
+                CostCenter(
+                    name="Overhead",
+                    type='OVERHEAD'
+                ),
+            ])
+            
+            # Create cost items (one INSERT)
+            cls.leasing_item_a, cls.overhead_item_a = CostItem.objects.bulk_create([
+                CostItem(
+                    name="Leasing",
+                    category='FIXED',
+                    unit='MONTH'
+                ),
+                CostItem(
+                    name="Overhead",
+                    category='INDIRECT',
+                    unit='MONTH'
+                ),
+            ])
+            
+            # Create postings (one INSERT)
+            CostPosting.objects.bulk_create([
+                # Vehicle: 2000€ for Feb
+                CostPosting(
+                    cost_center=cls.vehicle_center_a,
+                    cost_item=cls.leasing_item_a,
+                    amount=VEHICLE_COST_A,
+                    period_start=PERIOD_START,
+                    period_end=PERIOD_END
+                ),
+                # Overhead: 500€ for Feb
+                CostPosting(
+                    cost_center=cls.overhead_center_a,
+                    cost_item=cls.overhead_item_a,
+                    amount=OVERHEAD_COST_A,
+                    period_start=PERIOD_START,
+                    period_end=PERIOD_END
+                ),
+            ])
+            
+            # Create transport orders (one INSERT)
+            TransportOrder.objects.bulk_create([
+                # Order 1: 100km, 500€ revenue
+                TransportOrder(
+                    customer_name="Customer A1",
+                    date=date(2026, 2, 15),
+                    origin="Athens",
+                    destination="Patras",
+                    distance_km=Decimal('100.00'),
+                    agreed_price=Decimal('500.00'),
+                    assigned_vehicle=cls.vehicle_a
+                ),
+                # Order 2: 300km, 1200€ revenue
+                TransportOrder(
+                    customer_name="Customer A2",
+                    date=date(2026, 2, 20),
+                    origin="Thessaloniki",
+                    destination="Athens",
+                    distance_km=Decimal('300.00'),
+                    agreed_price=Decimal('1200.00'),
+                    assigned_vehicle=cls.vehicle_a
+                ),
+            ])
+        
+        # Setup Company B data
+        with tenant_context(cls.company_b):
             # Create cost center
-            self.vehicle_center_b = CostCenter.objects.create(
+            cls.vehicle_center_b = CostCenter.objects.create(
                 name="Vehicle BBB-2222",
                 type='VEHICLE',
-                vehicle=self.vehicle_b
+                vehicle=cls.vehicle_b
             )
             
             # Create cost item
-            self.leasing_item_b = CostItem.objects.create(
+            cls.leasing_item_b = CostItem.objects.create(
                 name="Leasing B",
                 category='FIXED',
                 unit='MONTH'
@@ -150,11 +176,11 @@ class CostEngineCalculationTestCase(TestCase):
             
             # Create posting: 999€ for Feb
             CostPosting.objects.create(
-                cost_center=self.vehicle_center_b,
-                cost_item=self.leasing_item_b,
-                amount=Decimal('999.00'),
-                period_start=self.period_start,
-                period_end=self.period_end
+                cost_center=cls.vehicle_center_b,
+                cost_item=cls.leasing_item_b,
+                amount=VEHICLE_COST_B,
+                period_start=PERIOD_START,
+                period_end=PERIOD_END
             )
             
             # Create order: 100km, 400€ revenue
@@ -165,170 +191,204 @@ class CostEngineCalculationTestCase(TestCase):
                 destination="Chania",
                 distance_km=Decimal('100.00'),
                 agreed_price=Decimal('400.00'),
-                assigned_vehicle=self.vehicle_b
+                assigned_vehicle=cls.vehicle_b
             )
     
+    def get_costs(self, company):
+        """
+        Calculation for the fixture period, computed once per company per class
+        
+        Every test starts from the same setUpTestData rows, so the result is
+        identical across tests and can be shared (tests only read it).
+        
+        Args:
+            company: company_a or company_b
+        
+        Returns:
+            tuple (result, snapshots grouped by cost_center_type)
+        """
+        costs = type(self)._costs_by_company
+        if company.pk not in costs:
+            with tenant_context(company):
+                result = calculate_company_costs(company, PERIOD_START, PERIOD_END)
+            by_type = {}
+            for snapshot in result['snapshots']:
+                by_type.setdefault(snapshot['cost_center_type'], []).append(snapshot)
+            costs[company.pk] = (result, by_type)
+        return costs[company.pk]
+    
     def test_vehicle_km_rate_calculation(self):
         """
         Test that vehicle rate is calculated correctly
         Expected: 2000€ / 400km = 5.0€/km
         """
-        with tenant_context(self.company_a):
-            result = calculate_company_costs(self.company_a, self.period_start, self.period_end)
-            
-            # Find vehicle snapshot
-            vehicle_snapshot = next(
-                (s for s in result['snapshots'] if s['cost_center_type'] == 'VEHICLE'),
-                None
-            )
-            
-            self.assertIsNotNone(vehicle_snapshot)
-            self.assertEqual(vehicle_snapshot['total_cost'], Decimal('2000.00'))
-            self.assertEqual(vehicle_snapshot['total_units'], Decimal('400.00'))
-            self.assertEqual(vehicle_snapshot['rate'], Decimal('5.00'))
-            self.assertEqual(vehicle_snapshot['status'], 'OK')
+        _, by_type = self.get_costs(self.company_a)
+        
+        # Find vehicle snapshot
+        self.assertIn('VEHICLE', by_type)
+        vehicle_snapshot = by_type['VEHICLE'][0]
+        
+        self.assertEqual(vehicle_snapshot['total_cost'], VEHICLE_COST_A)
+        self.assertEqual(vehicle_snapshot['total_units'], Decimal('400.00'))
+        self.assertEqual(vehicle_snapshot['rate'], Decimal('5.00'))
+        self.assertEqual(vehicle_snapshot['status'], 'OK')
     
     def test_overhead_revenue_rate_calculation(self):
         """
         Test that overhead rate is calculated correctly
         Expected: 500€ / 1700€ = 0.294117...
         """
-        with tenant_context(self.company_a):
-            result = calculate_company_costs(self.company_a, self.period_start, self.period_end)
-            
-            # Find overhead snapshot
-            overhead_snapshot = next(
-                (s for s in result['snapshots'] if s['cost_center_type'] == 'OVERHEAD'),
-                None
-            )
-            
-            self.assertIsNotNone(overhead_snapshot)
-            self.assertEqual(overhead_snapshot['total_cost'], Decimal('500.00'))
-            self.assertEqual(overhead_snapshot['total_units'], Decimal('1700.00'))
-            
-            # Rate should be approximately 0.294117
-            expected_rate = Decimal('500.00') / Decimal('1700.00')
-            self.assertAlmostEqual(
-                float(overhead_snapshot['rate']),
-                float(expected_rate),
-                places=4
-            )
-            self.assertEqual(overhead_snapshot['status'], 'OK')
+        _, by_type = self.get_costs(self.company_a)
+        
+        # Find overhead snapshot
+        self.assertIn('OVERHEAD', by_type)
+        overhead_snapshot = by_type['OVERHEAD'][0]
+        
+        self.assertEqual(overhead_snapshot['total_cost'], OVERHEAD_COST_A)
+        self.assertEqual(overhead_snapshot['total_units'], Decimal('1700.00'))
+        
+        # Rate should be approximately 0.294117 (compared at 4 places, in Decimal)
+        expected_rate = OVERHEAD_COST_A / Decimal('1700.00')
+        places = Decimal('0.0001')
+        self.assertEqual(
+            overhead_snapshot['rate'].quantize(places),
+            expected_rate.quantize(places)
+        )
+        self.assertEqual(overhead_snapshot['status'], 'OK')
     
     def test_order_breakdown_accuracy(self):
         """
         Test that order cost breakdown is calculated correctly
         """
+        result, _ = self.get_costs(self.company_a)
+        
+        # Should have 2 order breakdowns
+        self.assertEqual(len(result['breakdowns']), 2)
+        
+        # Verify vehicle allocation is calculated
+        # Note: Actual value depends on which vehicle cost center is used
+        # Just verify it's non-zero and calculations ran
+        breakdown1 = result['breakdowns'][0]
+        
+        # Vehicle cost should be non-zero
+        self.assertGreater(breakdown1['vehicle_alloc'], ZERO)
+        
+        # Overhead cost should be non-zero
+        self.assertGreater(breakdown1['overhead_alloc'], ZERO)
+        
+        # Total cost should be sum of allocations, for every breakdown
+        for breakdown in result['breakdowns']:
+            expected_total = sum((breakdown[key] for key in ALLOC_KEYS), ZERO)
+            self.assertEqual(breakdown['total_cost'], expected_total)
+    
+    def test_empty_duplicate_vehicle_center_is_ignored(self):
+        """
+        Test that an empty second VEHICLE center for the same vehicle does not
+        replace the one carrying its postings (it sorts last by name)
+        Expected: vehicle_alloc = distance × 5.0€/km = 500€ and 1500€
+        """
         with tenant_context(self.company_a):
-            result = calculate_company_costs(self.company_a, self.period_start, self.period_end)
-            
-            # Should have 2 order breakdowns
-            self.assertEqual(len(result['breakdowns']), 2)
-            
-            # Verify vehicle allocation is calculated
-            # Note: Actual value depends on which vehicle cost center is used
-            # Just verify it's non-zero and calculations ran
-            breakdown1 = result['breakdowns'][0]
-            
-            # Vehicle cost should be non-zero
-            self.assertGreater(breakdown1['vehicle_alloc'], Decimal('0.00'))
-            
-            # Overhead cost should be non-zero
-            self.assertGreater(breakdown1['overhead_alloc'], Decimal('0.00'))
-            
-            # Total cost should be sum of allocations
-            expected_total = breakdown1['vehicle_alloc'] + breakdown1['overhead_alloc'] + breakdown1['direct_cost'] + breakdown1['driver_alloc']
-            self.assertEqual(breakdown1['total_cost'], expected_total)
+            CostCenter.objects.create(name="ZZZ AAA-1111 - Mercedes", type='VEHICLE', vehicle=self.vehicle_a)
+            result = calculate_company_costs(self.company_a, PERIOD_START, PERIOD_END)
+        
+        vehicle_allocs = sorted(breakdown['vehicle_alloc'] for breakdown in result['breakdowns'])
+        self.assertEqual(vehicle_allocs, [Decimal('500.00'), Decimal('1500.00')])
     
     def test_tenant_isolation_in_calculations(self):
         """
         Test that Company B cannot see Company A's data
         """
         # Calculate for Company A
-        with tenant_context(self.company_a):
-            result_a = calculate_company_costs(self.company_a, self.period_start, self.period_end)
-            
-            # Should have at least 2 cost centers (vehicle + overhead)
-            self.assertGreaterEqual(len(result_a['snapshots']), 2)
-            
-            # Should have 2 orders
-            self.assertEqual(len(result_a['breakdowns']), 2)
-            
-            # Verify Company A's vehicle cost center is present
-            vehicle_snapshots_a = [s for s in result_a['snapshots'] if s['cost_center_type'] == 'VEHICLE']
-            self.assertGreater(len(vehicle_snapshots_a), 0)
+        result_a, by_type_a = self.get_costs(self.company_a)
+        
+        # Should have at least 2 cost centers (vehicle + overhead)
+        self.assertGreaterEqual(len(result_a['snapshots']), 2)
+        
+        # Should have 2 orders
+        self.assertEqual(len(result_a['breakdowns']), 2)
+        
+        # Verify Company A's vehicle cost center is present
+        self.assertTrue(by_type_a.get('VEHICLE'))
         
         # Calculate for Company B
-        with tenant_context(self.company_b):
-            result_b = calculate_company_costs(self.company_b, self.period_start, self.period_end)
-            
-            # Should have at least 1 cost center (vehicle)
-            self.assertGreaterEqual(len(result_b['snapshots']), 1)
-            
-            # Should have 1 order
-            self.assertEqual(len(result_b['breakdowns']), 1)
-            
-            # Verify it's Company B's data (vehicle cost center)
-            vehicle_snapshots_b = [s for s in result_b['snapshots'] if s['cost_center_type'] == 'VEHICLE']
-            self.assertGreater(len(vehicle_snapshots_b), 0)
-            self.assertEqual(vehicle_snapshots_b[0]['total_cost'], Decimal('999.00'))
+        result_b, by_type_b = self.get_costs(self.company_b)
+        
+        # Should have at least 1 cost center (vehicle)
+        self.assertGreaterEqual(len(result_b['snapshots']), 1)
+        
+        # Should have 1 order
+        self.assertEqual(len(result_b['breakdowns']), 1)
+        
+        # Verify it's Company B's data (vehicle cost center)
+        vehicle_snapshots_b = by_type_b.get('VEHICLE', [])
+        self.assertTrue(vehicle_snapshots_b)
+        self.assertEqual(vehicle_snapshots_b[0]['total_cost'], VEHICLE_COST_B)
     
-    def test_empty_period_returns_zero_results(self):
+    def test_query_count_independent_of_rows(self):
         """
-        Test that a period with no data returns structured zero-result
+        Test that a calculation runs a fixed number of queries (N+1 guard)
+        Company A and Company B have different numbers of cost centers and orders
         """
-        # Create Company C with no data
-        company_c = Company.objects.create(
-            name="Company C",
-            tax_id="333333333",
-            transport_type="FREIGHT"
-        )
+        for company in (self.company_a, self.company_b):
+            with self.subTest(company=company.name):
+                # Cost centers + postings + orders
+                with tenant_context(company), self.assertNumQueries(3):
+                    calculate_company_costs(company, PERIOD_START, PERIOD_END)
+
+
+class CostEngineLogicTestCase(SimpleTestCase):
+    """
+    Pure-calculation tests for calculate_company_costs (no database)
+    
+    The three reads (cost centers, postings, orders) are patched to return
+    unsaved model instances; SimpleTestCase fails the test if any query
+    slips through.
+    
+    Verifies that:
+    1. Empty states are handled gracefully
+    2. Cost centers without activity get MISSING_ACTIVITY status
+    """
+    
+    def _calculate(self, cost_centers=(), postings=(), orders=()):
+        """
+        Run the engine for an unsaved company over in-memory rows
+        """
+        company = Company(id=1, name="Company C", tax_id="333333333")
         
-        with tenant_context(company_c):
-            result = calculate_company_costs(company_c, self.period_start, self.period_end)
-            
-            # Should return empty lists, not errors
-            self.assertEqual(len(result['snapshots']), 0)
-            self.assertEqual(len(result['breakdowns']), 0)
-            self.assertEqual(result['summary']['total_cost'], Decimal('0.00'))
-            self.assertEqual(result['summary']['total_revenue'], Decimal('0.00'))
+        manager = mock.Mock()
+        manager.all.return_value = list(cost_centers)
+        calculator = 'finance.services.cost_engine.calculator'
+        with mock.patch.object(CostCenter, 'objects', manager), \
+                mock.patch(f'{calculator}.fetch_cost_postings', return_value=list(postings)), \
+                mock.patch(f'{calculator}.fetch_transport_orders', return_value=list(orders)), \
+                tenant_context(company):
+            return calculate_company_costs(company, PERIOD_START, PERIOD_END)
     
-    def test_missing_activity_sets_status(self):
+    def test_degenerate_periods(self):
         """
-        Test that cost centers with no activity get MISSING_ACTIVITY status
+        Test that empty periods and idle cost centers return structured zero results
         """
-        # Create Company D with posting but no orders
-        company_d = Company.objects.create(
-            name="Company D",
-            tax_id="444444444",
-            transport_type="FREIGHT"
+        center = CostCenter(id=1, name="Idle Center", type='VEHICLE')
+        posting = CostPosting(
+            cost_center=center,
+            amount=Decimal('1000.00'),
+            period_start=PERIOD_START,
+            period_end=PERIOD_END
         )
         
-        with tenant_context(company_d):
-            # Create cost center and posting
-            center = CostCenter.objects.create(
-                name="Idle Center",
-                type='VEHICLE'
-            )
-            
-            item = CostItem.objects.create(
-                name="Fixed Cost",
-                category='FIXED',
-                unit='MONTH'
-            )
-            
-            CostPosting.objects.create(
-                cost_center=center,
-                cost_item=item,
-                amount=Decimal('1000.00'),
-                period_start=self.period_start,
-                period_end=self.period_end
-            )
-            
-            # Calculate (no orders = no activity)
-            result = calculate_company_costs(company_d, self.period_start, self.period_end)
-            
-            # Should have 1 snapshot with MISSING_ACTIVITY status
-            self.assertEqual(len(result['snapshots']), 1)
-            self.assertEqual(result['snapshots'][0]['status'], 'MISSING_ACTIVITY')
-            self.assertEqual(result['snapshots'][0]['rate'], Decimal('0.00'))
+        # (label, cost centers, postings, expected statuses, expected total cost)
+        cases = [
+            ('empty period', [], [], [], ZERO),
+            ('no orders = no activity', [center], [posting], ['MISSING_ACTIVITY'], Decimal('1000.00')),
+        ]
+        for label, cost_centers, postings, statuses, total_cost in cases:
+            with self.subTest(label):
+                result = self._calculate(cost_centers=cost_centers, postings=postings)
+                
+                # Should return structured results, not errors
+                self.assertEqual([snap['status'] for snap in result['snapshots']], statuses)
+                for snap in result['snapshots']:
+                    self.assertEqual(snap['rate'], ZERO)
+                self.assertEqual(len(result['breakdowns']), 0)
+                self.assertEqual(result['summary']['total_cost'], total_cost)
+                self.assertEqual(result['summary']['total_revenue'], ZERO)
@@ -14,13 +14,13 @@ Covers:
 """
 from datetime import date
 from decimal import Decimal
+from types import MappingProxyType
 
 from django.test import TestCase
 from django.contrib.auth.models import User
 from rest_framework.test import APIClient
 
 from core.models import Company
-from core.tenant_context import tenant_context
 from operations.models import Vehicle
 from finance.models import (
     CostCenter,
@@ -31,13 +31,50 @@ from finance.models import (
 
 HISTORY_URL = '/api/v1/cost-engine/history/'
 
-
-def _make_company(name, tax_id):
-    return Company.objects.create(name=name, tax_id=tax_id, address=f"Address {name}")
-
-
-def _make_vehicle(company, plate):
-    return Vehicle.objects.create(
+# January 2026, the period every seeded row belongs to
+PERIOD_START = date(2026, 1, 1)
+PERIOD_END = date(2026, 1, 31)
+PERIOD_START_ISO = PERIOD_START.isoformat()
+PERIOD_END_ISO = PERIOD_END.isoformat()
+# Read-only: every test in the process shares this object, so an in-place
+# edit would leak into later tests; build variants with {**PERIOD, ...}
+PERIOD = MappingProxyType({'period_start': PERIOD_START_ISO, 'period_end': PERIOD_END_ISO})
+
+# Keys every response item must carry
+SNAPSHOT_FIELDS = frozenset({
+    'period_start', 'period_end', 'cost_center_id', 'cost_center_name',
+    'basis_unit', 'total_cost', 'total_units', 'rate', 'status',
+})
+BREAKDOWN_FIELDS = frozenset({
+    'order_id', 'order_date', 'customer_name', 'origin', 'destination',
+    'distance_km', 'period_start', 'period_end',
+    'vehicle_alloc', 'overhead_alloc', 'direct_cost', 'total_cost',
+    'revenue', 'profit', 'margin', 'status',
+})
+SUMMARY_FIELDS = frozenset({
+    'total_cost_sum', 'total_units_sum', 'avg_rate', 'snapshot_count', 'breakdown_count',
+})
+
+# Seeded order/breakdown amounts, parsed once at import
+_D_0 = Decimal('0.00')
+_D_300 = Decimal('300.00')
+_D_500 = Decimal('500.00')
+_D_700 = Decimal('700.00')
+_D_1000 = Decimal('1000.00')
+_D_1300 = Decimal('1300.00')
+_D_2000 = Decimal('2000.00')
+_D_35 = Decimal('35.0000')
+
+
+# Builders return unsaved instances for bulk_create. None of these models
+# override save(), so skipping it changes nothing.
+
+def _build_company(name, tax_id):
+    return Company(name=name, tax_id=tax_id, address=f"Address {name}")
+
+
+def _build_vehicle(company, plate):
+    return Vehicle(
         company=company,
         license_plate=plate,
         make='Mercedes',
@@ -50,8 +87,8 @@ def _make_vehicle(company, plate):
     )
 
 
-def _make_cost_center(company, name, vehicle=None):
-    return CostCenter.objects.create(
+def _build_cost_center(company, name, vehicle=None):
+    return CostCenter(
         company=company,
         name=name,
         type='VEHICLE' if vehicle else 'OVERHEAD',
@@ -60,10 +97,10 @@ def _make_cost_center(company, name, vehicle=None):
     )
 
 
-def _make_snapshot(company, cost_center, period_start, period_end, *, basis_unit='KM',
-                   total_cost='1000.00', total_units='500.000', rate='2.000000',
-                   status='OK'):
-    return CostRateSnapshot.objects.create(
+def _build_snapshot(company, cost_center, period_start, period_end, *, basis_unit='KM',
+                    total_cost='1000.00', total_units='500.000', rate='2.000000',
+                    status='OK'):
+    return CostRateSnapshot(
         company=company,
         cost_center=cost_center,
         period_start=period_start,
@@ -76,33 +113,33 @@ def _make_snapshot(company, cost_center, period_start, period_end, *, basis_unit
     )
 
 
-def _make_order(company, vehicle, order_date):
-    return TransportOrder.objects.create(
+def _build_order(company, vehicle, order_date):
+    return TransportOrder(
         company=company,
         customer_name='Test Customer',
         date=order_date,
         origin='Athens',
         destination='Thessaloniki',
-        distance_km=Decimal('500.00'),
-        agreed_price=Decimal('2000.00'),
+        distance_km=_D_500,
+        agreed_price=_D_2000,
         assigned_vehicle=vehicle,
         status='COMPLETED',
     )
 
 
-def _make_breakdown(company, order, period_start, period_end, *, status='OK'):
-    return OrderCostBreakdown.objects.create(
+def _build_breakdown(company, order, period_start, period_end, *, status='OK'):
+    return OrderCostBreakdown(
         company=company,
         transport_order=order,
         period_start=period_start,
         period_end=period_end,
-        vehicle_alloc=Decimal('1000.00'),
-        overhead_alloc=Decimal('300.00'),
-        direct_cost=Decimal('0.00'),
-        total_cost=Decimal('1300.00'),
-        revenue=Decimal('2000.00'),
-        profit=Decimal('700.00'),
-        margin=Decimal('35.0000'),
+        vehicle_alloc=_D_1000,
+        overhead_alloc=_D_300,
+        direct_cost=_D_0,
+        total_cost=_D_1300,
+        revenue=_D_2000,
+        profit=_D_700,
+        margin=_D_35,
         status=status,
     )
 
@@ -110,118 +147,123 @@ def _make_breakdown(company, order, period_start, period_end, *, status='OK'):
 class CostEngineHistoryAPITest(TestCase):
     """Full test suite for GET /api/v1/cost-engine/history/"""
 
-    def setUp(self):
+    @classmethod
+    def setUpTestData(cls):
+        # Read-only seed data, built once per class (no test mutates it)
         # Companies
-        self.company_a = _make_company('Company A', '111111111')
-        self.company_b = _make_company('Company B', '222222222')
+        cls.company_a, cls.company_b = Company.objects.bulk_create([
+            _build_company('Company A', '111111111'),
+            _build_company('Company B', '222222222'),
+        ])
+        cls.company_a_id_str = str(cls.company_a.id)
 
         # Users
-        self.superuser = User.objects.create_superuser(
+        cls.superuser = User.objects.create_superuser(
             username='su_hist', email='su@test.com', password='pass'
         )
-        self.staff_user = User.objects.create_user(
+        cls.staff_user = User.objects.create_user(
             username='staff_hist', email='staff@test.com', password='pass', is_staff=True
         )
-        self.regular_user = User.objects.create_user(
+        cls.regular_user = User.objects.create_user(
             username='reg_hist', email='reg@test.com', password='pass'
         )
 
-        # Seed data for company_a — January 2026
-        with tenant_context(self.company_a):
-            self.vehicle_a = _make_vehicle(self.company_a, 'HIST-A-001')
-            self.cc_a = _make_cost_center(self.company_a, 'CC-HIST-A', self.vehicle_a)
-            self.snap_a = _make_snapshot(
-                self.company_a, self.cc_a,
-                date(2026, 1, 1), date(2026, 1, 31),
-            )
-            self.snap_a_zero = _make_snapshot(
-                self.company_a, self.cc_a,
-                date(2026, 1, 1), date(2026, 1, 31),
+        # Seed data for both companies — January 2026, one INSERT per model.
+        # Every row carries an explicit company, so no tenant_context is needed.
+        cls.vehicle_a, cls.vehicle_b = Vehicle.all_objects.bulk_create([
+            _build_vehicle(cls.company_a, 'HIST-A-001'),
+            _build_vehicle(cls.company_b, 'HIST-B-001'),
+        ])
+        cls.cc_a, cls.cc_b = CostCenter.all_objects.bulk_create([
+            _build_cost_center(cls.company_a, 'CC-HIST-A', cls.vehicle_a),
+            _build_cost_center(cls.company_b, 'CC-HIST-B', cls.vehicle_b),
+        ])
+        cls.snap_a, cls.snap_a_zero, cls.snap_b = CostRateSnapshot.all_objects.bulk_create([
+            _build_snapshot(cls.company_a, cls.cc_a, PERIOD_START, PERIOD_END),
+            _build_snapshot(
+                cls.company_a, cls.cc_a, PERIOD_START, PERIOD_END,
                 basis_unit='HOUR',
                 total_cost='0.00', total_units='0.000', rate='0.000000',
                 status='MISSING_ACTIVITY',
-            )
-            self.order_a = _make_order(self.company_a, self.vehicle_a, date(2026, 1, 15))
-            self.bd_a = _make_breakdown(
-                self.company_a, self.order_a,
-                date(2026, 1, 1), date(2026, 1, 31),
-            )
-
-        # Seed data for company_b — same period
-        with tenant_context(self.company_b):
-            self.vehicle_b = _make_vehicle(self.company_b, 'HIST-B-001')
-            self.cc_b = _make_cost_center(self.company_b, 'CC-HIST-B', self.vehicle_b)
-            self.snap_b = _make_snapshot(
-                self.company_b, self.cc_b,
-                date(2026, 1, 1), date(2026, 1, 31),
-                total_cost='9999.00',
-            )
-
-        self.client = APIClient()
+            ),
+            _build_snapshot(cls.company_b, cls.cc_b, PERIOD_START, PERIOD_END, total_cost='9999.00'),
+        ])
+
+        # Single rows: a plain save() is already one INSERT
+        cls.order_a = _build_order(cls.company_a, cls.vehicle_a, date(2026, 1, 15))
+        cls.order_a.save()
+        cls.bd_a = _build_breakdown(cls.company_a, cls.order_a, PERIOD_START, PERIOD_END)
+        cls.bd_a.save()
+
+        # One client for the whole class; setUp/cleanup reset its auth per test
+        cls._client = APIClient()
+
+    def setUp(self):
+        # Read through type() so TestCase doesn't deep-copy the shared client
+        self.client = type(self)._client
+        # Most tests run as superuser; permission tests re-authenticate
+        self.client.force_authenticate(user=self.superuser)
+        self.addCleanup(self.client.logout)
+
+    def _get(self, **overrides):
+        """GET the history endpoint for company_a in January; None drops a param."""
+        params = {**PERIOD, 'company_id': self.company_a_id_str, **overrides}
+        return self.client.get(
+            HISTORY_URL,
+            {key: value for key, value in params.items() if value is not None},
+        )
 
     # ------------------------------------------------------------------
     # Auth / permission
     # ------------------------------------------------------------------
 
     def test_unauthenticated_returns_403(self):
-        response = self.client.get(HISTORY_URL, {'period_start': '2026-01-01', 'period_end': '2026-01-31'})
+        self.client.force_authenticate(user=None)
+        response = self._get(company_id=None)
         # DRF returns 401 when JWTAuthentication is the first authenticator
         # and no credentials are provided. Both 401 and 403 indicate rejection.
         self.assertIn(response.status_code, [401, 403])
 
     def test_regular_user_returns_403(self):
         self.client.force_authenticate(user=self.regular_user)
-        response = self.client.get(HISTORY_URL, {'period_start': '2026-01-01', 'period_end': '2026-01-31'})
+        response = self._get(company_id=None)
         self.assertEqual(response.status_code, 403)
 
-    def test_staff_user_returns_200(self):
-        """Staff user can access with explicit company_id via superuser, or via DEBUG fallback."""
-        # Staff user cannot specify company_id, but superuser can — test with superuser
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            HISTORY_URL,
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31',
-             'company_id': str(self.company_a.id)},
-        )
-        self.assertEqual(response.status_code, 200)
-
-    def test_superuser_returns_200(self):
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            HISTORY_URL,
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31',
-             'company_id': str(self.company_a.id)},
-        )
-        self.assertEqual(response.status_code, 200)
-
     # ------------------------------------------------------------------
     # Response structure
     # ------------------------------------------------------------------
 
-    def test_response_has_required_keys(self):
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            HISTORY_URL,
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31',
-             'company_id': str(self.company_a.id)},
-        )
-        self.assertEqual(response.status_code, 200)
+    def test_happy_path_response(self):
+        """One superuser GET for company_a, checked from every angle."""
+        # Company lookup + snapshots (summary is computed in Python); a
+        # per-snapshot query would push this past 2. On failure the
+        # assertion lists the captured SQL.
+        with self.assertNumQueries(2):
+            response = self._get()
+        with self.subTest('status'):
+            self.assertEqual(response.status_code, 200)
         data = response.json()
-        self.assertIn('meta', data)
-        self.assertIn('snapshots', data)
-        self.assertIn('breakdowns', data)
-        self.assertIn('summary', data)
 
-    def test_meta_source_is_persisted(self):
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            HISTORY_URL,
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31',
-             'company_id': str(self.company_a.id)},
-        )
-        data = response.json()
-        self.assertEqual(data['meta']['source'], 'persisted')
-        self.assertEqual(data['meta']['schema'], 'v1.0')
+        with self.subTest('required keys'):
+            self.assertIn('meta', data)
+            self.assertIn('snapshots', data)
+            self.assertIn('breakdowns', data)
+            self.assertIn('summary', data)
+
+        with self.subTest('meta.source'):
+            self.assertEqual(data['meta']['source'], 'persisted')
+            self.assertEqual(data['meta']['schema'], 'v1.0')
+
+        with self.subTest('summary fields'):
+            summary = data['summary']
+            self.assertTrue(SUMMARY_FIELDS.issubset(summary),
+                            f"Missing summary fields: {SUMMARY_FIELDS - summary.keys()}")
+
+        with self.subTest('snapshot fields'):
+            self.assertGreater(len(data['snapshots']), 0)
+            snap = data['snapshots'][0]
+            self.assertTrue(SNAPSHOT_FIELDS.issubset(snap),
+                            f"Missing snapshot fields: {SNAPSHOT_FIELDS - snap.keys()}")
 
     # ------------------------------------------------------------------
     # Date defaulting
@@ -229,11 +271,9 @@ class CostEngineHistoryAPITest(TestCase):
 
     def test_no_dates_defaults_to_previous_month(self):
         """When no dates provided, defaults to previous full calendar month."""
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            HISTORY_URL,
-            {'company_id': str(self.company_a.id)},
-        )
+        # Only meta is inspected: ask for the lightest payload
+        response = self._get(period_start=None, period_end=None,
+                             include_breakdowns='0', only_nonzero='1')
         self.assertEqual(response.status_code, 200)
         data = response.json()
         # meta should contain period_start and period_end
@@ -250,22 +290,14 @@ class CostEngineHistoryAPITest(TestCase):
     # ------------------------------------------------------------------
 
     def test_month_param_overrides_dates(self):
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            HISTORY_URL,
-            {'month': '2026-01', 'company_id': str(self.company_a.id)},
-        )
+        response = self._get(period_start=None, period_end=None, month='2026-01')
         self.assertEqual(response.status_code, 200)
         data = response.json()
-        self.assertEqual(data['meta']['period_start'], '2026-01-01')
-        self.assertEqual(data['meta']['period_end'], '2026-01-31')
+        self.assertEqual(data['meta']['period_start'], PERIOD_START_ISO)
+        self.assertEqual(data['meta']['period_end'], PERIOD_END_ISO)
 
     def test_invalid_month_returns_400(self):
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            HISTORY_URL,
-            {'month': '01-2026', 'company_id': str(self.company_a.id)},
-        )
+        response = self._get(period_start=None, period_end=None, month='01-2026')
         self.assertEqual(response.status_code, 400)
 
     # ------------------------------------------------------------------
@@ -273,56 +305,33 @@ class CostEngineHistoryAPITest(TestCase):
     # ------------------------------------------------------------------
 
     def test_include_breakdowns_false_returns_empty_list(self):
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            HISTORY_URL,
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31',
-             'company_id': str(self.company_a.id),
-             'include_breakdowns': '0'},
-        )
+        response = self._get(include_breakdowns='0')
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()['breakdowns'], [])
 
     def test_include_breakdowns_true_returns_data(self):
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            HISTORY_URL,
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31',
-             'company_id': str(self.company_a.id),
-             'include_breakdowns': '1'},
-        )
+        # Breakdowns add exactly one query, however many rows are serialized
+        with self.assertNumQueries(3):
+            response = self._get(include_breakdowns='1')
         self.assertEqual(response.status_code, 200)
         data = response.json()
         self.assertGreater(len(data['breakdowns']), 0)
         # Check breakdown fields
         bd = data['breakdowns'][0]
-        for field in ('order_id', 'order_date', 'customer_name', 'origin', 'destination',
-                      'distance_km', 'period_start', 'period_end',
-                      'vehicle_alloc', 'overhead_alloc', 'direct_cost', 'total_cost',
-                      'revenue', 'profit', 'margin', 'status'):
-            self.assertIn(field, bd, f"Missing field: {field}")
+        self.assertTrue(BREAKDOWN_FIELDS.issubset(bd),
+                        f"Missing breakdown fields: {BREAKDOWN_FIELDS - bd.keys()}")
 
     # ------------------------------------------------------------------
     # only_nonzero
     # ------------------------------------------------------------------
 
     def test_only_nonzero_excludes_zero_snapshots(self):
-        self.client.force_authenticate(user=self.superuser)
         # Without filter — should include MISSING_ACTIVITY snapshot
-        response_all = self.client.get(
-            HISTORY_URL,
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31',
-             'company_id': str(self.company_a.id)},
-        )
+        response_all = self._get()
         count_all = len(response_all.json()['snapshots'])
 
         # With filter
-        response_nz = self.client.get(
-            HISTORY_URL,
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31',
-             'company_id': str(self.company_a.id),
-             'only_nonzero': '1'},
-        )
+        response_nz = self._get(only_nonzero='1')
         count_nz = len(response_nz.json()['snapshots'])
         self.assertLess(count_nz, count_all)
 
@@ -332,18 +341,12 @@ class CostEngineHistoryAPITest(TestCase):
 
     def test_tenant_isolation_company_a_cannot_see_company_b(self):
         """Snapshots for company_b must not appear in company_a response."""
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            HISTORY_URL,
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31',
-             'company_id': str(self.company_a.id)},
-        )
+        response = self._get()
         self.assertEqual(response.status_code, 200)
-        data = response.json()
-        # company_b snapshot has total_cost=9999; company_a has 1000
-        for snap in data['snapshots']:
-            self.assertNotEqual(snap['total_cost'], '9999.00',
-                                "Company B data leaked into Company A response")
+        # total_cost=9999.00 is unique to company_b's seeded snapshot, so a
+        # substring search on the raw body detects a leak without parsing JSON
+        self.assertNotIn(b'"total_cost":"9999.00"', response.content,
+                         "Company B data leaked into Company A response")
 
     # ------------------------------------------------------------------
     # company_id param
@@ -351,20 +354,11 @@ class CostEngineHistoryAPITest(TestCase):
 
     def test_non_superuser_cannot_specify_company_id(self):
         self.client.force_authenticate(user=self.staff_user)
-        response = self.client.get(
-            HISTORY_URL,
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31',
-             'company_id': str(self.company_a.id)},
-        )
+        response = self._get()
         self.assertEqual(response.status_code, 403)
 
     def test_invalid_company_id_returns_404(self):
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            HISTORY_URL,
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31',
-             'company_id': '99999'},
-        )
+        response = self._get(company_id='99999')
         self.assertEqual(response.status_code, 404)
 
     # ------------------------------------------------------------------
@@ -372,83 +366,27 @@ class CostEngineHistoryAPITest(TestCase):
     # ------------------------------------------------------------------
 
     def test_invalid_date_format_returns_400(self):
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            HISTORY_URL,
-            {'period_start': '01/01/2026', 'period_end': '31/01/2026',
-             'company_id': str(self.company_a.id)},
-        )
+        response = self._get(period_start='01/01/2026', period_end='31/01/2026')
         self.assertEqual(response.status_code, 400)
 
     def test_period_start_after_period_end_returns_400(self):
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            HISTORY_URL,
-            {'period_start': '2026-01-31', 'period_end': '2026-01-01',
-             'company_id': str(self.company_a.id)},
-        )
+        response = self._get(period_start=PERIOD_END_ISO, period_end=PERIOD_START_ISO)
         self.assertEqual(response.status_code, 400)
 
     def test_only_period_start_without_end_returns_400(self):
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            HISTORY_URL,
-            {'period_start': '2026-01-01',
-             'company_id': str(self.company_a.id)},
-        )
+        response = self._get(period_end=None)
         self.assertEqual(response.status_code, 400)
 
     def test_invalid_basis_unit_returns_400(self):
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            HISTORY_URL,
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31',
-             'company_id': str(self.company_a.id),
-             'basis_unit': 'INVALID'},
-        )
+        response = self._get(basis_unit='INVALID')
         self.assertEqual(response.status_code, 400)
 
-    # ------------------------------------------------------------------
-    # Summary fields
-    # ------------------------------------------------------------------
-
-    def test_summary_fields_present(self):
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            HISTORY_URL,
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31',
-             'company_id': str(self.company_a.id)},
-        )
-        summary = response.json()['summary']
-        for field in ('total_cost_sum', 'total_units_sum', 'avg_rate',
-                      'snapshot_count', 'breakdown_count'):
-            self.assertIn(field, summary, f"Missing summary field: {field}")
-
-    def test_snapshot_fields_present(self):
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            HISTORY_URL,
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31',
-             'company_id': str(self.company_a.id)},
-        )
-        data = response.json()
-        self.assertGreater(len(data['snapshots']), 0)
-        snap = data['snapshots'][0]
-        for field in ('period_start', 'period_end', 'cost_center_id', 'cost_center_name',
-                      'basis_unit', 'total_cost', 'total_units', 'rate', 'status'):
-            self.assertIn(field, snap, f"Missing snapshot field: {field}")
-
     # ------------------------------------------------------------------
     # MISSING_ACTIVITY status preserved
     # ------------------------------------------------------------------
 
     def test_missing_activity_status_preserved(self):
         """MISSING_ACTIVITY snapshots are returned with correct status."""
-        self.client.force_authenticate(user=self.superuser)
-        response = self.client.get(
-            HISTORY_URL,
-            {'period_start': '2026-01-01', 'period_end': '2026-01-31',
-             'company_id': str(self.company_a.id)},
-        )
+        response = self._get()
         statuses = [s['status'] for s in response.json()['snapshots']]
         self.assertIn('MISSING_ACTIVITY', statuses)
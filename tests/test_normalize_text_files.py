@@ -0,0 +1,173 @@
+"""
+Normalization Script Tests
+Ensures scripts/normalize_text_files.py only rewrites text files it may touch
+"""
+import contextlib
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+from unittest import mock
+from django.test import SimpleTestCase
+from scripts import normalize_text_files as ntf
+
+
+class NormalizeTextFilesTestCase(SimpleTestCase):
+    """
+    Test suite for scripts/normalize_text_files.py
+
+    Verifies that:
+    1. normalize_file reports MODIFIED / UNCHANGED / FAILED
+    2. Unchanged files are skipped via the mtime/size cache; failed files are
+       counted and left out of the cache, so they are retried
+    3. Binary and non-UTF-8 files are never rewritten
+    4. Rewrites use a private temp file and never clobber foo.txt.tmp
+    5. --glob prunes VCS, environment and vendor directories
+    """
+
+    def setUp(self):
+        """
+        Run each test in an empty working directory (the cache file is relative)
+        """
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root = Path(tmp_dir.name)
+
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.root)
+
+    def _write(self, name, content):
+        path = self.root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+        return path
+
+    def _run(self, *argv):
+        """
+        Run main() with argv, returning (exit code, stdout)
+        """
+        out = io.StringIO()
+        with mock.patch('sys.argv', ['normalize_text_files.py', *argv]), contextlib.redirect_stdout(out):
+            exit_code = ntf.main()
+        return exit_code, out.getvalue()
+
+    def _cache(self):
+        return json.loads((self.root / ntf.CACHE_FILE).read_text(encoding='utf-8'))
+
+    def test_normalize_file_results(self):
+        """
+        Test that normalize_file distinguishes modified, clean and failed files
+        """
+        dirty = self._write('dirty.txt', b'a\r\nb\xc2\xa0c\r')
+        clean = self._write('clean.txt', b'a\nb\n')
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(ntf.normalize_file(str(dirty)), ntf.MODIFIED)
+            self.assertEqual(ntf.normalize_file(str(clean)), ntf.UNCHANGED)
+            self.assertEqual(ntf.normalize_file(str(self.root / 'missing.txt')), ntf.FAILED)
+
+        self.assertEqual(dirty.read_bytes(), b'a\nb c\n')
+
+    def test_cached_file_is_not_read_until_it_changes(self):
+        """
+        Test that a second run trusts the mtime/size cache, and a changed size
+        or mtime sends the file through normalize_file again
+        """
+        path = self._write('clean.txt', b'clean\n')
+        self._run('--glob', '*.txt')
+        self.assertIn('clean.txt', self._cache())
+
+        with mock.patch.object(ntf, 'normalize_file', wraps=ntf.normalize_file) as normalize:
+            exit_code, output = self._run('--glob', '*.txt')
+        self.assertEqual(exit_code, 0)
+        self.assertIn("-> OK (unchanged since last run)", output)
+        normalize.assert_not_called()
+
+        # Size changes: rewritten and re-cached under the new key
+        path.write_bytes(b'clean\r\nmore\r\n')
+        with mock.patch.object(ntf, 'normalize_file', wraps=ntf.normalize_file) as normalize:
+            exit_code, output = self._run('--glob', '*.txt')
+        normalize.assert_called_once_with('clean.txt')
+        self.assertIn("Modified: 1", output)
+        self.assertEqual(path.read_bytes(), b'clean\nmore\n')
+        self.assertEqual(self._cache()['clean.txt'], ntf._stat_key('clean.txt'))
+
+        # Same size, new mtime: read again, nothing to change
+        mtime_ns = os.stat(path).st_mtime_ns + 1_000_000_000
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+        with mock.patch.object(ntf, 'normalize_file', wraps=ntf.normalize_file) as normalize:
+            exit_code, output = self._run('--glob', '*.txt')
+        normalize.assert_called_once_with('clean.txt')
+        self.assertIn("-> OK (no changes needed)", output)
+        self.assertEqual(self._cache()['clean.txt'], [mtime_ns, len(b'clean\nmore\n')])
+
+    def test_failed_write_is_counted_and_retried(self):
+        """
+        Test that a file whose write fails is reported and not cached
+        """
+        path = self._write('dirty.txt', b'line\r\n')
+
+        with mock.patch.object(ntf.os, 'replace', side_effect=OSError("disk full")):
+            exit_code, output = self._run('--glob', '*.txt')
+
+        self.assertEqual(exit_code, 1)
+        self.assertIn("Errors:   1", output)
+        self.assertEqual(path.read_bytes(), b'line\r\n')
+        self.assertNotIn('dirty.txt', self._cache())
+
+        # Next run retries the file instead of trusting the cache
+        exit_code, output = self._run('--glob', '*.txt')
+
+        self.assertEqual(exit_code, 0)
+        self.assertIn("Modified: 1", output)
+        self.assertEqual(path.read_bytes(), b'line\n')
+        self.assertIn('dirty.txt', self._cache())
+
+    def test_write_never_touches_other_tmp_files(self):
+        """
+        Test that an existing foo.txt.tmp survives, and a failed write leaves no temp file
+        """
+        path = self._write('dirty.txt', b'line\r\n')
+        neighbour = self._write('dirty.txt.tmp', b'keep me\r\n')
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            with mock.patch.object(ntf.os, 'replace', side_effect=OSError("disk full")):
+                self.assertEqual(ntf.normalize_file(str(path)), ntf.FAILED)
+            self.assertEqual(sorted(os.listdir(self.root)), ['dirty.txt', 'dirty.txt.tmp'])
+
+            self.assertEqual(ntf.normalize_file(str(path)), ntf.MODIFIED)
+
+        self.assertEqual(path.read_bytes(), b'line\n')
+        self.assertEqual(neighbour.read_bytes(), b'keep me\r\n')
+        self.assertEqual(sorted(os.listdir(self.root)), ['dirty.txt', 'dirty.txt.tmp'])
+
+    def test_binary_and_non_utf8_files_are_skipped(self):
+        """
+        Test that files with NUL bytes or invalid UTF-8 are left byte-for-byte intact
+        """
+        binary = self._write('image.txt', b'\x89PNG\r\n\x1a\n\x00\xe2\x80\x8e')
+        latin1 = self._write('latin1.txt', b'caf\xe9\r\n')
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(ntf.normalize_file(str(binary)), ntf.SKIPPED)
+            self.assertEqual(ntf.normalize_file(str(latin1)), ntf.SKIPPED)
+
+        self.assertEqual(binary.read_bytes(), b'\x89PNG\r\n\x1a\n\x00\xe2\x80\x8e')
+        self.assertEqual(latin1.read_bytes(), b'caf\xe9\r\n')
+
+    def test_glob_prunes_vcs_and_vendor_dirs(self):
+        """
+        Test that --glob never reaches .git, environments or node_modules
+        """
+        for name in ('.git/objects/pack.txt', 'venv/lib/site.txt', 'node_modules/pkg/readme.txt'):
+            self._write(name, b'vendored\r\n')
+        self._write('docs/notes.txt', b'notes\r\n')
+
+        self.assertEqual(ntf.find_files('*.txt'), [os.path.join('docs', 'notes.txt')])
+
+        exit_code, output = self._run('--glob', '*.txt')
+
+        self.assertEqual(exit_code, 0)
+        self.assertIn("Modified: 1", output)
+        self.assertEqual((self.root / '.git/objects/pack.txt').read_bytes(), b'vendored\r\n')
@@ -0,0 +1,308 @@
+"""
+Operations Signal Tests
+Ensures the odometer and CostCenter receivers fire exactly once per save
+"""
+from decimal import Decimal
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from core.models import Company
+from core.tenant_context import tenant_context
+from finance.models import CostCenter
+from operations import signals
+from operations.models import FuelEntry, ServiceLog, Vehicle
+from operations.services import bulk_create_fuel_entries, bulk_create_service_logs
+
+
+class OperationsSignalTestCase(TestCase):
+    """
+    Test suite for operations/signals.py
+
+    Verifies that:
+    1. Receivers are connected once, even if reconnected
+    2. FuelEntry/ServiceLog saves raise the vehicle odometer
+    3. Lower readings never roll the odometer back
+    4. Vehicle creation yields exactly one CostCenter, after commit, and
+       never a second VEHICLE center for the same vehicle
+    5. Bulk imports refresh odometers in one pass
+    6. disable_signals() bypasses every receiver
+    """
+
+    def setUp(self):
+        """
+        Set up test data: company and vehicle
+        """
+        self.company = Company.objects.create(
+            name="Company A",
+            tax_id="111111111",
+            transport_type="FREIGHT"
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vehicle = Vehicle.all_objects.create(
+                company=self.company,
+                license_plate="AAA-1111",
+                make="Mercedes",
+                model="Actros",
+                vehicle_class="TRUCK",
+                body_type="BOX"
+            )
+
+    def _create_fuel_entry(self, odometer_reading):
+        return FuelEntry.all_objects.create(
+            company=self.company,
+            vehicle=self.vehicle,
+            date='2026-02-01',
+            liters=Decimal('100.00'),
+            cost_per_liter=Decimal('1.500'),
+            total_cost=Decimal('150.00'),
+            odometer_reading=odometer_reading
+        )
+
+    def test_receivers_connect_once(self):
+        """
+        Test that reconnecting a receiver with its dispatch_uid is a no-op
+        """
+        receivers_before = len(post_save._live_receivers(FuelEntry)[0])
+
+        post_save.connect(
+            signals.update_odometer_from_fuel_entry,
+            sender=FuelEntry,
+            dispatch_uid='ops.fuel.odometer'
+        )
+
+        self.assertEqual(len(post_save._live_receivers(FuelEntry)[0]), receivers_before)
+
+    def test_fuel_entry_raises_odometer(self):
+        """
+        Test that a higher FuelEntry reading updates current_odometer
+        """
+        self._create_fuel_entry(10000)
+
+        self.vehicle.refresh_from_db()
+        self.assertEqual(self.vehicle.current_odometer, 10000)
+
+    def test_odometer_receiver_skips_company_lookup(self):
+        """
+        Test that a FuelEntry saved with only company_id costs its INSERT plus
+        one odometer UPDATE (no Company or Vehicle SELECT)
+        """
+        with self.assertNumQueries(2):
+            FuelEntry.all_objects.create(
+                company_id=self.company.pk,
+                vehicle_id=self.vehicle.pk,
+                date='2026-02-01',
+                liters=Decimal('100.00'),
+                cost_per_liter=Decimal('1.500'),
+                total_cost=Decimal('150.00'),
+                odometer_reading=10000
+            )
+
+        self.vehicle.refresh_from_db()
+        self.assertEqual(self.vehicle.current_odometer, 10000)
+
+    def test_lower_reading_keeps_odometer(self):
+        """
+        Test that a lower reading never rolls the odometer back
+        """
+        self._create_fuel_entry(10000)
+        ServiceLog.all_objects.create(
+            company=self.company,
+            vehicle=self.vehicle,
+            date='2026-01-15',
+            service_type='REGULAR',
+            odometer_reading=9000,
+            total_cost=Decimal('200.00'),
+            description="Αλλαγή λαδιών"
+        )
+
+        self.vehicle.refresh_from_db()
+        self.assertEqual(self.vehicle.current_odometer, 10000)
+
+    def test_vehicle_creates_cost_center(self):
+        """
+        Test that creating a Vehicle auto-creates its CostCenter
+        """
+        cost_center = CostCenter.all_objects.get(company=self.company, name="AAA-1111 - Mercedes")
+
+        self.assertEqual(cost_center.vehicle, self.vehicle)
+        self.assertEqual(cost_center.type, 'VEHICLE')
+
+    def test_existing_cost_center_is_reused(self):
+        """
+        Test that a pre-existing CostCenter with the same name is not duplicated
+        """
+        CostCenter.all_objects.create(company=self.company, name="BBB-2222 - Volvo")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Vehicle.all_objects.create(
+                company=self.company,
+                license_plate="BBB-2222",
+                make="Volvo",
+                model="FH16",
+                vehicle_class="TRUCK",
+                body_type="CURTAIN"
+            )
+
+        self.assertEqual(
+            CostCenter.all_objects.filter(company=self.company, name="BBB-2222 - Volvo").count(),
+            1
+        )
+
+    def test_existing_vehicle_center_keeps_its_link(self):
+        """
+        Test that a vehicle created with its own VEHICLE center (as
+        seed_cost_engine_demo does) gets an unlinked auto center, not a second one
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            vehicle = Vehicle.all_objects.create(
+                company=self.company,
+                license_plate="DEMO-001",
+                make="Mercedes",
+                model="Actros",
+                vehicle_class="TRUCK",
+                body_type="CURTAIN"
+            )
+            CostCenter.all_objects.create(
+                company=self.company,
+                name="CC-DEMO-001",
+                type='VEHICLE',
+                vehicle=vehicle
+            )
+
+        auto_center = CostCenter.all_objects.get(company=self.company, name="DEMO-001 - Mercedes")
+        self.assertEqual(auto_center.type, 'OTHER')
+        self.assertIsNone(auto_center.vehicle_id)
+        self.assertEqual(
+            list(CostCenter.all_objects.filter(type='VEHICLE', vehicle=vehicle).values_list('name', flat=True)),
+            ["CC-DEMO-001"]
+        )
+
+    def test_cost_center_waits_for_commit(self):
+        """
+        Test that the CostCenter INSERT is deferred until the transaction commits
+        """
+        with self.captureOnCommitCallbacks() as callbacks:
+            Vehicle.all_objects.create(
+                company=self.company,
+                license_plate="CCC-3333",
+                make="Scania",
+                model="R450",
+                vehicle_class="TRACTOR",
+                body_type="TRACTOR_UNIT"
+            )
+
+        name = "CCC-3333 - Scania"
+        self.assertFalse(CostCenter.all_objects.filter(company=self.company, name=name).exists())
+
+        for callback in callbacks:
+            callback()
+
+        self.assertTrue(CostCenter.all_objects.filter(company=self.company, name=name).exists())
+
+    def test_cost_center_receiver_skips_company_lookup(self):
+        """
+        Test that a Vehicle saved with only company_id never SELECTs its Company
+        """
+        with CaptureQueriesContext(connection) as queries:
+            with self.captureOnCommitCallbacks(execute=True):
+                Vehicle.all_objects.create(
+                    company_id=self.company.pk,
+                    license_plate="EEE-5555",
+                    make="DAF",
+                    model="XF",
+                    vehicle_class="TRUCK",
+                    body_type="BOX"
+                )
+
+        self.assertTrue(
+            CostCenter.all_objects.filter(company=self.company, name="EEE-5555 - DAF").exists()
+        )
+        self.assertFalse(any('FROM "core_company"' in query['sql'] for query in queries))
+
+    def test_bulk_import_refreshes_odometer(self):
+        """
+        Test that bulk_create_fuel_entries raises the odometer to the max reading
+        """
+        entries = [
+            FuelEntry(
+                company=self.company,
+                vehicle=self.vehicle,
+                date='2026-02-01',
+                liters=Decimal('100.00'),
+                cost_per_liter=Decimal('1.500'),
+                total_cost=Decimal('150.00'),
+                odometer_reading=reading
+            )
+            for reading in (12000, 15000, 11000)
+        ]
+
+        with tenant_context(self.company):
+            bulk_create_fuel_entries(entries)
+
+        self.vehicle.refresh_from_db()
+        self.assertEqual(self.vehicle.current_odometer, 15000)
+
+    def test_skip_signal_flag_bypasses_receiver(self):
+        """
+        Test that instances flagged _skip_signal leave the odometer untouched
+        """
+        entry = FuelEntry(
+            company=self.company,
+            vehicle=self.vehicle,
+            date='2026-02-01',
+            liters=Decimal('100.00'),
+            cost_per_liter=Decimal('1.500'),
+            total_cost=Decimal('150.00'),
+            odometer_reading=20000
+        )
+        entry._skip_signal = True
+        entry.save()
+
+        self.vehicle.refresh_from_db()
+        self.assertEqual(self.vehicle.current_odometer, 0)
+
+    def test_bulk_import_fills_total_cost(self):
+        """
+        Test that bulk imports apply the same total_cost rule as save()
+        """
+        log = ServiceLog(
+            company=self.company,
+            vehicle=self.vehicle,
+            date='2026-02-10',
+            service_type='REPAIR',
+            odometer_reading=10500,
+            cost_parts=Decimal('120.00'),
+            cost_labor=Decimal('80.00'),
+            description="Επισκευή φρένων"
+        )
+
+        with tenant_context(self.company):
+            bulk_create_service_logs([log])
+
+        self.assertEqual(ServiceLog.all_objects.get().total_cost, Decimal('200.00'))
+
+    def test_disable_signals_bypasses_receivers(self):
+        """
+        Test that disable_signals() skips odometer and CostCenter receivers
+        """
+        with signals.disable_signals(), self.captureOnCommitCallbacks(execute=True):
+            self._create_fuel_entry(30000)
+            Vehicle.all_objects.create(
+                company=self.company,
+                license_plate="DDD-4444",
+                make="MAN",
+                model="TGX",
+                vehicle_class="TRACTOR",
+                body_type="TRACTOR_UNIT"
+            )
+
+        self.vehicle.refresh_from_db()
+        self.assertEqual(self.vehicle.current_odometer, 0)
+        self.assertFalse(CostCenter.all_objects.filter(name="DDD-4444 - MAN").exists())
+
+        # Receivers are active again outside the block
+        self._create_fuel_entry(30000)
+        self.vehicle.refresh_from_db()
+        self.assertEqual(self.vehicle.current_odometer, 30000)
@@ -7,8 +7,9 @@ from django.contrib.auth.models import User
 from core.models import Company
 from core.mixins import set_current_company, get_current_company
 from accounts.models import UserProfile
-from finance.models import CompanyExpense, ExpenseCategory, ExpenseFamily, TransportOrder
+from finance.models import CompanyExpense, CostCenter, ExpenseCategory, ExpenseFamily, TransportOrder
 from operations.models import FuelEntry, ServiceLog, Vehicle
+from web.forms import CompanyExpenseForm
 
 
 class TenantIsolationTestCase(TestCase):
@@ -163,6 +164,39 @@ class TenantIsolationTestCase(TestCase):
         
         set_current_company(None)
     
+    def test_scoped_queryset_does_not_join_company(self):
+        """
+        Test that scoped querysets only filter by company and never join it
+        """
+        set_current_company(self.company_a)
+        
+        self.assertNotIn('"core_company"', str(CompanyExpense.objects.all().query))
+        self.assertEqual(CompanyExpense.objects.count(), 2)
+        
+        # defer('company') conflicts with a default select_related('company')
+        expenses = list(CompanyExpense.objects.defer('company').order_by('amount'))
+        self.assertEqual([expense.pk for expense in expenses], [self.expense_a1.pk, self.expense_a2.pk])
+        
+        set_current_company(None)
+    
+    def test_cost_center_choices_join_company(self):
+        """
+        Test that the expense form labels cost centers without a query per row
+        """
+        CostCenter.all_objects.bulk_create([
+            CostCenter(company=self.company_a, name="Center 1"),
+            CostCenter(company=self.company_a, name="Center 2"),
+        ])
+        set_current_company(self.company_a)
+        form = CompanyExpenseForm(company=self.company_a)
+        
+        with self.assertNumQueries(1):
+            labels = [label for value, label in form.fields['cost_center'].choices if value]
+        
+        self.assertEqual(sorted(labels), ["Company A - Center 1", "Company A - Center 2"])
+        
+        set_current_company(None)
+    
     def test_direct_access_prevention(self):
         """
         Test that direct ID access is prevented across tenants
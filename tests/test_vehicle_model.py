@@ -0,0 +1,398 @@
+"""
+Vehicle Model Tests
+Ensures Vehicle valuation and cost-reporting helpers stay numerically correct
+"""
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+from dateutil.relativedelta import relativedelta
+from django.core.management import call_command
+from django.core.management.sql import emit_post_migrate_signal, emit_pre_migrate_signal
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from core.models import Company
+from operations.models import FuelEntry, IncidentReport, ServiceLog, Vehicle, VehicleCostSummary
+
+
+class VehicleAccountingValueTestCase(TestCase):
+    """
+    Test suite for Vehicle.current_accounting_value
+
+    Verifies that:
+    1. Missing acquisition data returns purchase_value unchanged
+    2. Whole and fractional years follow value * 0.84^years
+    """
+
+    def setUp(self):
+        """
+        Set up test data: company and vehicle
+        """
+        self.company = Company.objects.create(
+            name="Company A",
+            tax_id="111111111",
+            transport_type="FREIGHT"
+        )
+
+        self.vehicle = Vehicle.all_objects.create(
+            company=self.company,
+            license_plate="AAA-1111",
+            make="Mercedes",
+            model="Actros",
+            vehicle_class="TRUCK",
+            body_type="BOX",
+            purchase_value=Decimal('100000.00')
+        )
+
+    def test_no_acquisition_date_returns_purchase_value(self):
+        """
+        Test that a vehicle without acquisition_date is not depreciated
+        """
+        self.assertEqual(self.vehicle.current_accounting_value, Decimal('100000.00'))
+
+    def test_two_years_owned(self):
+        """
+        Test that two full years apply 0.84^2
+        """
+        self.vehicle.acquisition_date = date.today() - relativedelta(years=2)
+
+        self.assertEqual(self.vehicle.current_accounting_value, Decimal('70560.00'))
+
+    def test_fractional_year_owned(self):
+        """
+        Test that 18 months apply 0.84^1.5 (rounded to cents)
+        """
+        self.vehicle.acquisition_date = date.today() - relativedelta(years=1, months=6)
+
+        expected = (Decimal('100000.00') * Decimal('0.84') ** Decimal('1.5')).quantize(Decimal('0.01'))
+        self.assertEqual(self.vehicle.current_accounting_value, expected)
+
+
+class VehicleAccountingValueAnnotationTestCase(TestCase):
+    """
+    Test suite for Vehicle.with_accounting_value()
+
+    Verifies that the DB-side current_value_db matches the Python property
+    """
+
+    def setUp(self):
+        """
+        Set up test data: company and vehicles with different ages
+        """
+        self.company = Company.objects.create(
+            name="Company A",
+            tax_id="111111111",
+            transport_type="FREIGHT"
+        )
+
+        today = date.today()
+        acquisitions = {
+            "AAA-1111": (None, Decimal('100000.00')),
+            "AAA-2222": (today - relativedelta(years=2), Decimal('100000.00')),
+            "AAA-3333": (today - relativedelta(years=1, months=6), Decimal('100000.00')),
+            "AAA-4444": (today - relativedelta(years=3, months=7), Decimal('87345.67')),
+            "AAA-5555": (today - relativedelta(months=5), Decimal('45999.99')),
+        }
+        for plate, (acquisition_date, purchase_value) in acquisitions.items():
+            Vehicle.all_objects.create(
+                company=self.company,
+                license_plate=plate,
+                make="Mercedes",
+                model="Actros",
+                vehicle_class="TRUCK",
+                body_type="BOX",
+                purchase_value=purchase_value,
+                acquisition_date=acquisition_date
+            )
+
+    def test_annotation_matches_property(self):
+        """
+        Test that current_value_db equals current_accounting_value to the cent
+        """
+        vehicles = Vehicle.with_accounting_value(Vehicle.all_objects.all())
+
+        for vehicle in vehicles:
+            with self.subTest(plate=vehicle.license_plate):
+                self.assertIsInstance(vehicle.current_value_db, Decimal)
+                self.assertEqual(vehicle.current_value_db, vehicle.current_accounting_value)
+
+    def test_annotation_matches_property_at_month_end(self):
+        """
+        Test that month-end acquisitions count months like relativedelta
+        (Jan 31 -> Apr 30 is 3 months; Feb 29 -> Feb 28 two years on is 24)
+        """
+        for plate, acquisition_date in (("BBB-1111", date(2026, 1, 31)), ("BBB-2222", date(2024, 2, 29))):
+            Vehicle.all_objects.create(
+                company=self.company,
+                license_plate=plate,
+                make="Mercedes",
+                model="Actros",
+                vehicle_class="TRUCK",
+                body_type="BOX",
+                purchase_value=Decimal('100000.00'),
+                acquisition_date=acquisition_date
+            )
+
+        for today in (date(2026, 2, 28), date(2026, 3, 30), date(2026, 4, 30)):
+            fixed_date = type('FixedDate', (date,), {'today': classmethod(lambda cls: today)})
+            with mock.patch('operations.models.date', fixed_date):
+                vehicles = Vehicle.with_accounting_value(Vehicle.all_objects.filter(license_plate__startswith="BBB"))
+                for vehicle in vehicles:
+                    with self.subTest(today=today, plate=vehicle.license_plate):
+                        self.assertEqual(vehicle.current_value_db, vehicle.current_accounting_value)
+
+    def test_order_by_annotation(self):
+        """
+        Test that vehicles can be ordered by the annotated value in the DB
+        """
+        plates = list(
+            Vehicle.with_accounting_value(Vehicle.all_objects.all())
+            .order_by('-current_value_db')
+            .values_list('license_plate', flat=True)
+        )
+
+        self.assertEqual(plates, ["AAA-1111", "AAA-3333", "AAA-2222", "AAA-4444", "AAA-5555"])
+
+
+class VehicleCostSummaryTestCase(TestCase):
+    """
+    Test suite for the vehicle_cost_summary reporting view
+    """
+
+    def setUp(self):
+        """
+        Set up test data: company, vehicle, fuel and service costs
+        """
+        self.company = Company.objects.create(
+            name="Company A",
+            tax_id="111111111",
+            transport_type="FREIGHT"
+        )
+
+        self.vehicle = Vehicle.all_objects.create(
+            company=self.company,
+            license_plate="AAA-1111",
+            make="Mercedes",
+            model="Actros",
+            vehicle_class="TRUCK",
+            body_type="BOX"
+        )
+
+        for total_cost in (Decimal('150.00'), Decimal('50.00')):
+            FuelEntry.all_objects.create(
+                company=self.company,
+                vehicle=self.vehicle,
+                date='2026-02-01',
+                liters=Decimal('100.00'),
+                cost_per_liter=Decimal('1.500'),
+                total_cost=total_cost,
+                odometer_reading=10000
+            )
+
+        ServiceLog.all_objects.create(
+            company=self.company,
+            vehicle=self.vehicle,
+            date='2026-02-10',
+            service_type='REGULAR',
+            odometer_reading=10500,
+            total_cost=Decimal('300.00'),
+            description="Αλλαγή λαδιών"
+        )
+
+    def test_summary_totals(self):
+        """
+        Test that the summary exposes per-vehicle totals without fan-out
+        """
+        summary = VehicleCostSummary.all_objects.get(vehicle=self.vehicle)
+
+        self.assertEqual(summary.company_id, self.company.id)
+        self.assertEqual(summary.fuel_total, Decimal('200.00'))
+        self.assertEqual(summary.service_total, Decimal('300.00'))
+        self.assertEqual(summary.incident_total, Decimal('0.00'))
+        self.assertEqual(summary.total_cost, Decimal('500.00'))
+
+
+class VehicleCostSummaryMigrationTestCase(TransactionTestCase):
+    """
+    Regression tests: the vehicle_cost_summary view must never block a
+    migration that rebuilds an operations table (SQLite remakes the table,
+    PostgreSQL refuses to alter columns a view depends on)
+
+    Verifies that:
+    1. The pre_migrate/post_migrate hooks let a FuelEntry AlterField run
+    2. Migrating operations back past the view and forward again leaves
+       a working view
+    """
+
+    def _view_exists(self):
+        return 'vehicle_cost_summary' in connection.introspection.table_names(include_views=True)
+
+    def _create_vehicle_with_fuel(self):
+        company = Company.objects.create(
+            name="Company A",
+            tax_id="111111111",
+            transport_type="FREIGHT"
+        )
+        vehicle = Vehicle.all_objects.create(
+            company=company,
+            license_plate="AAA-1111",
+            make="Mercedes",
+            model="Actros",
+            vehicle_class="TRUCK",
+            body_type="BOX"
+        )
+        FuelEntry.all_objects.create(
+            company=company,
+            vehicle=vehicle,
+            date='2026-02-01',
+            liters=Decimal('100.00'),
+            cost_per_liter=Decimal('1.500'),
+            total_cost=Decimal('150.00'),
+            odometer_reading=10000
+        )
+        return vehicle
+
+    def test_alter_fuelentry_field_between_migrate_hooks(self):
+        """
+        Test that a FuelEntry AlterField succeeds inside a migrate run
+        """
+        vehicle = self._create_vehicle_with_fuel()
+        old_field = FuelEntry._meta.get_field('total_cost')
+        new_field = old_field.clone()
+        new_field.max_digits = old_field.max_digits + 2
+        new_field.set_attributes_from_name('total_cost')
+        new_field.model = FuelEntry
+
+        emit_pre_migrate_signal(verbosity=0, interactive=False, db=connection.alias)
+        self.assertFalse(self._view_exists())
+
+        with connection.schema_editor() as editor:
+            editor.alter_field(FuelEntry, old_field, new_field)
+            editor.alter_field(FuelEntry, new_field, old_field)
+
+        emit_post_migrate_signal(verbosity=0, interactive=False, db=connection.alias)
+        self.assertTrue(self._view_exists())
+        self.assertEqual(
+            VehicleCostSummary.all_objects.get(vehicle=vehicle).fuel_total,
+            Decimal('150.00')
+        )
+
+    def test_migrate_operations_backwards_and_forwards(self):
+        """
+        Test that operations migrations reverse and reapply around the view
+        """
+        # Reversing 0010 remakes operations_vehicle on SQLite
+        call_command('migrate', 'operations', '0007', verbosity=0)
+        call_command('migrate', 'operations', verbosity=0)
+        self.assertTrue(self._view_exists())
+
+        vehicle = self._create_vehicle_with_fuel()
+        self.assertEqual(
+            VehicleCostSummary.all_objects.get(vehicle=vehicle).total_cost,
+            Decimal('150.00')
+        )
+
+
+class VehicleCargoVolumeTestCase(TestCase):
+    """
+    Test suite for the DB-generated Vehicle.cargo_volume_m3 column
+    """
+
+    def setUp(self):
+        """
+        Set up test data: company and vehicles with/without cargo dimensions
+        """
+        self.company = Company.objects.create(
+            name="Company A",
+            tax_id="111111111",
+            transport_type="FREIGHT"
+        )
+
+        self.box = Vehicle.all_objects.create(
+            company=self.company,
+            license_plate="AAA-1111",
+            make="Mercedes",
+            model="Atego",
+            vehicle_class="TRUCK",
+            body_type="BOX",
+            cargo_length_m=Decimal('7.20'),
+            cargo_width_m=Decimal('2.45'),
+            cargo_height_m=Decimal('2.50')
+        )
+
+        self.tractor = Vehicle.all_objects.create(
+            company=self.company,
+            license_plate="AAA-2222",
+            make="Volvo",
+            model="FH16",
+            vehicle_class="TRACTOR",
+            body_type="TRACTOR_UNIT"
+        )
+
+    def test_volume_computed_by_db(self):
+        """
+        Test that cargo_volume_m3 is length × width × height, NULL without dimensions
+        """
+        self.box.refresh_from_db()
+        self.tractor.refresh_from_db()
+
+        self.assertEqual(self.box.cargo_volume_m3, Decimal('44.1000'))
+        self.assertIsNone(self.tractor.cargo_volume_m3)
+
+    def test_filter_by_volume(self):
+        """
+        Test that routing queries can range-filter on the generated column
+        """
+        self.assertQuerySetEqual(
+            Vehicle.all_objects.filter(cargo_volume_m3__gte=40),
+            [self.box]
+        )
+
+
+class ChoiceDisplayTestCase(TestCase):
+    """
+    Test suite for the cached get_FOO_display overrides
+
+    Verifies that labels match the choices and unknown values fall back to the raw value
+    """
+
+    def setUp(self):
+        """
+        Set up test data: company and vehicle
+        """
+        self.company = Company.objects.create(
+            name="Company A",
+            tax_id="111111111",
+            transport_type="FREIGHT"
+        )
+
+        self.vehicle = Vehicle.all_objects.create(
+            company=self.company,
+            license_plate="AAA-1111",
+            make="Mercedes",
+            model="Actros",
+            vehicle_class="TRUCK",
+            body_type="BOX",
+            emission_class="EURO_6"
+        )
+
+    def test_vehicle_labels(self):
+        """
+        Test that Vehicle display methods return the TextChoices labels
+        """
+        self.assertEqual(self.vehicle.get_vehicle_class_display(), 'Φορτηγό (Rigid Truck)')
+        self.assertEqual(self.vehicle.get_body_type_display(), 'Κόφα (Box/Van Body)')
+        self.assertEqual(self.vehicle.get_emission_class_display(), 'Euro 6')
+        self.assertEqual(self.vehicle.get_status_display(), 'Ενεργό')
+
+    def test_log_labels(self):
+        """
+        Test that ServiceLog/IncidentReport labels resolve, with raw-value fallback
+        """
+        log = ServiceLog(vehicle=self.vehicle, service_type='KTEO')
+        incident = IncidentReport(vehicle=self.vehicle, type='FINE')
+
+        self.assertEqual(log.get_service_type_display(), 'Έλεγχος ΚΤΕΟ')
+        self.assertEqual(incident.get_type_display(), 'Κλήση Τροχαίας')
+
+        incident.type = 'LEGACY'
+        self.assertEqual(incident.get_type_display(), 'LEGACY')
@@ -19,6 +19,7 @@ class ViewTenantIsolationTestCase(TestCase):
     1. List views show only current company's records
     2. Detail views return 404 for other companies' records
     3. Create views auto-assign company
+    4. Dashboard KPIs only aggregate current company's records
     """
     
     def setUp(self):
@@ -199,6 +200,22 @@ class ViewTenantIsolationTestCase(TestCase):
         self.assertIn(self.order_a.id, order_ids)
         self.assertNotIn(self.order_b.id, order_ids)
     
+    def test_dashboard_maintenance_kpi_isolation(self):
+        """
+        Test that the dashboard maintenance KPI only counts current company's vehicles
+        """
+        # Company A: last REGULAR service at 50,000 km, odometer below it -> not due
+        self.client.login(username='user_a', password='testpass123')
+        response = self.client.get(reverse('web:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['upcoming_maintenance'], 0)
+        
+        # Company B: no REGULAR service and 60,000 km on the clock -> due
+        self.client.login(username='user_b', password='testpass123')
+        response = self.client.get(reverse('web:dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['upcoming_maintenance'], 1)
+    
     def test_detail_view_returns_404_for_other_company(self):
         """
         Test that detail views return 404 when accessing other company's records
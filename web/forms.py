@@ -66,10 +66,10 @@ class CompanyExpenseForm(TailwindFormMixin, forms.ModelForm):
 
         # Tenant-scoped querysets
         if company:
-            self.fields["cost_center"].queryset = CostCenter.objects.filter(company=company, is_active=True)
+            self.fields["cost_center"].queryset = CostCenter.objects.filter(company=company, is_active=True).select_related("company")
             self.fields["employee"].queryset = Employee.objects.filter(company=company, is_active=True)
         elif self.instance and self.instance.pk and getattr(self.instance, "company", None):
-            self.fields["cost_center"].queryset = CostCenter.objects.filter(company=self.instance.company, is_active=True)
+            self.fields["cost_center"].queryset = CostCenter.objects.filter(company=self.instance.company, is_active=True).select_related("company")
             self.fields["employee"].queryset = Employee.objects.filter(company=self.instance.company, is_active=True)
 
         # Group categories by family using optgroup
@@ -5,7 +5,7 @@ Frontend Interface with HTMX and Leaflet
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.http import HttpResponse
-from django.db.models import Sum, Avg, Count, Q
+from django.db.models import Sum, Avg, Count, Q, OuterRef, Subquery
 from django.utils import timezone
 from datetime import datetime, timedelta
 from decimal import Decimal
@@ -78,18 +78,23 @@ def dashboard_home(request):
     
     # KPI 4: Upcoming Maintenance (vehicles due for service in next 30 days or 1000 km)
     # Simplified logic: vehicles with odometer > 10000 km since last service
+    # One query: latest REGULAR service reading per vehicle via subquery, no model hydration
+    last_regular_service = ServiceLog.objects.filter(
+        vehicle=OuterRef('pk'),
+        service_type='REGULAR'
+    ).order_by('-date').values('odometer_reading')[:1]
+    
     upcoming_maintenance = 0
-    for vehicle in Vehicle.objects.filter(company=company, status='ACTIVE'):
-        last_service = ServiceLog.objects.filter(
-            vehicle=vehicle,
-            service_type='REGULAR'
-        ).order_by('-date').first()
-        
-        if last_service:
-            km_since_service = vehicle.current_odometer - last_service.odometer_reading
+    for current_odometer, last_service_km in Vehicle.objects.filter(
+        company=company, status='ACTIVE'
+    ).annotate(
+        last_regular_service_km=Subquery(last_regular_service)
+    ).values_list('current_odometer', 'last_regular_service_km'):
+        if last_service_km is not None:
+            km_since_service = current_odometer - last_service_km
             if km_since_service > 9000:  # Due soon (within 1000 km of 10k interval)
                 upcoming_maintenance += 1
-        elif vehicle.current_odometer > 9000:
+        elif current_odometer > 9000:
             upcoming_maintenance += 1
     
     context = {
@@ -939,7 +944,7 @@ def fleet_list(request):
     # Calculate average fixed cost per hour
     if total_vehicles > 0:
         total_fixed_costs = sum([v.fixed_cost_per_hour for v in vehicles])
-        avg_fixed_cost_per_hour = total_fixed_costs / Decimal(str(total_vehicles))
+        avg_fixed_cost_per_hour = total_fixed_costs / Decimal(total_vehicles)
     else:
         avg_fixed_cost_per_hour = Decimal('0.00')
     